@@ -6,7 +6,13 @@ Contient la classe Dispositif.
 """
 from entite_parcelle import EntiteParcelle
 
-LISTE_PRODUITS = ["eau", "engrais", "insecticide"]
+# Bit associé à chaque produit dans les masques de produits
+BIT_EAU = 1
+BIT_ENGRAIS = 2
+BIT_INSECTICIDE = 4
+BITS_PRODUITS = {"eau": BIT_EAU, "engrais": BIT_ENGRAIS,
+                 "insecticide": BIT_INSECTICIDE}
+LISTE_PRODUITS = list(BITS_PRODUITS)
 
 
 class Dispositif(EntiteParcelle):
@@ -35,30 +41,24 @@ class Dispositif(EntiteParcelle):
 
     Methods
     -------
-    actif(self) -> bool:
-        Renvoie un booléen indiquant si le dispositif est activé à ce pas.
-    definir_programme(self, debut_programme: int, duree_activation: int,
-                      periode_activation: int, eau: bool = False,
-                      engrais: bool = False,
-                      insecticide: bool = False) -> None:
-        Redéfinit le programme du dispositif.
+    actif(self) -> int:
+        Renvoie le masque des produits dispersés par le dispositif à ce pas.
+    ajouter_programme(self, prog: Programme) -> None:
+        Ajoute un programme à la liste de programmes du dispositif.
     """
 
     def __init__(self,
                  portee: int,
-                 programmes: list = []) -> None:
+                 programmes: list = None) -> None:
         """Constructeur de la classe Dispositif.
 
         Parameters
         ----------
         portee : int >= 0
             Rayon d'action en distance de Manhattan du dispositif.
-        eau : bool = False, optional
-            Vrai si le dispositif diffuse de l'eau.
-        engrais : bool = False, optional
-            Vrai si le dispositif diffuse de l'engrais.
-        insecticide : bool = False, optional
-            Vrai si le dispositif diffuse de l'insecticide.
+        programmes : list[Programme] = None, optional
+            Programmes initiaux du dispositif. D'autres programmes peuvent
+            être ajoutés ensuite par ajouter_programme.
 
         Raises
         ------
@@ -74,18 +74,17 @@ class Dispositif(EntiteParcelle):
         """
         super().__init__()
 
-        self._eau = False
-        self._engrais = False
-        self._insecticide = False
+        self._produits = 0  # Masque des produits programmés
 
         self._programmes = []
-        if not isinstance(programmes, list):
-            raise TypeError("programmes doit être une liste.")
-        for ele in programmes:
-            try:
-                self.ajouter_programme(ele)
-            except TypeError:
-                raise Exception("Un des programmes rentré est invalide.")
+        if programmes is not None:
+            if not isinstance(programmes, (list, tuple)):
+                raise TypeError("programmes doit être une liste.")
+            for ele in programmes:
+                try:
+                    self.ajouter_programme(ele)
+                except TypeError:
+                    raise Exception("Un des programmes rentré est invalide.")
 
         # Définition de la portée (pas de setter)
         try:
@@ -108,46 +107,48 @@ class Dispositif(EntiteParcelle):
     @property
     def eau(self):
         """Attribute eau getter."""
-        return self._eau
+        return bool(self._produits & BIT_EAU)
 
     @property
     def engrais(self):
         """Attribute engrais getter."""
-        return self._engrais
+        return bool(self._produits & BIT_ENGRAIS)
 
     @property
     def insecticide(self):
         """Attribute insecticide getter."""
-        return self._insecticide
+        return bool(self._produits & BIT_INSECTICIDE)
 
-    def ajout_prog(self, prog) -> None:
+    def ajouter_programme(self, prog) -> None:
         """Ajoute un programme à la liste de programmes du dispositif."""
         if isinstance(prog, Programme):
             self._programmes.append(prog)
-            if prog.produit == "eau":
-                self._eau = True
-            if prog.produit == "engrais":
-                self._engrais = True
-            if prog.produit == "insecticide":
-                self._insecticide = True
+            self._produits |= prog._bit
         else:
             raise TypeError("Le paramètre n'est pas un programme valide.")
 
     # Méthodes pour la simulation
     @property
-    def actif(self) -> set:
-        """Renvoie le set des produits dispersés à ce pas.
+    def actif(self) -> int:
+        """Renvoie le masque des produits dispersés à ce pas.
 
-        La liste des produits dispersés à ce pas est établie pour tous les
-        programmes du dispositif. Si un programme est actif, alors son produit
-        est dispersé ce pas-ci.
+        Le masque des produits dispersés à ce pas est établi pour tous les
+        programmes du dispositif. Si un programme est actif, alors le bit de
+        son produit (BIT_EAU, BIT_ENGRAIS ou BIT_INSECTICIDE) est levé.
         """
-        return set([prog.produit
-                    for prog in self._programmes
-                    if prog.actif(self.age)])
+        masque = 0
+        for prog in self._programmes:
+            if prog.actif(self._age):
+                masque |= prog._bit
+        return masque
 
 
 class Programme():
+    """Programme d'activation d'un dispositif pour un produit."""
+
+    # Pas de __dict__ : on ne peut pas ajouter d'attribut à un programme
+    __slots__ = ("_produit", "_bit", "_debut", "_duree", "_periode", "_motif")
+
     def __init__(self, produit: str, debut: int,
                  duree: int, periode: int) -> None:
         """Constructeur de la classe Programme.
@@ -170,6 +171,7 @@ class Programme():
             raise TypeError("""produit doit être un
                             élément de la liste :""", LISTE_PRODUITS)
         self._produit = produit
+        self._bit = BITS_PRODUITS[produit]
         try:
             self.debut = debut
             self.duree = duree
@@ -210,6 +212,8 @@ class Programme():
         if self._duree < 0:
             raise ValueError("duree doit être supérieur"
                              + " ou égal à 0.")
+        if hasattr(self, "_periode"):  # Programme déjà construit
+            self._calculer_motif()
 
     @property
     def periode(self):
@@ -229,21 +233,31 @@ class Programme():
             raise ValueError("periode doit être"
                              + " supérieur ou égal à 0 et au moins aussi"
                              + " grand que la durée d'activation.")
+        self._calculer_motif()
 
     @property
     def produit(self):
         """Attribute produit getter."""
         return self._produit
 
+    def _calculer_motif(self) -> None:
+        """Précalcule le motif d'activation sur une période.
+
+        Le motif est un tuple de taille periode dont l'élément k est Vrai si
+        le programme est actif k pas après le début d'une période.
+        """
+        self._motif = tuple(k < self._duree for k in range(self._periode))
+
     def actif(self, age: int) -> bool:
         """Renvoie Vrai si le programme est actif au pas spécifié.
 
         L'activation du programme est établie en fonction de:
             -Le pas actuel et le pas debut
             -La période d'activation et la durée d'activation
+        Le résultat est lu dans le motif précalculé par _calculer_motif.
         """
-        return (age >= self.debut  # Programme démarré
-                and ((age - self.debut) % self.periode) < (self.duree))
+        return (age >= self._debut  # Programme démarré
+                and self._motif[(age - self._debut) % self._periode])
 
 
 if __name__ == "__main__":
@@ -20,6 +20,9 @@ class EntiteParcelle():
     age : int = 0
         Temps écoulé en pas depuis la création de l'entité.
         A pour valeur maximum le pas actuel du potager.
+    _loglevel : int = 0
+        Niveau de log du potager en cours de simulation. Attribut de classe
+        relevé par Potager.pas au début de chaque pas.
 
     Methods
     -------
@@ -27,6 +30,12 @@ class EntiteParcelle():
             Augmente le pas de l'entité.
     """
 
+    __slots__ = ("_parcelle", "_age")
+
+    # Niveau de log relevé par Potager.pas, pour éviter de remonter
+    # entité → parcelle → potager à chaque message
+    _loglevel = 0
+
     def __init__(self) -> None:
         """Constructeur de l'entité de parcelle.
 
@@ -6,7 +6,7 @@ Contient la classe Insecte.
 """
 # Import from builtins
 from math import inf
-from random import random, randint, choice, normalvariate
+from random import random, randint, choice, gauss
 # Import interne
 from entite_parcelle import EntiteParcelle
 
@@ -14,16 +14,34 @@ from entite_parcelle import EntiteParcelle
 GENES = ["_pv_max", "_esperance_vie", "_mobilite", "_resistance",
          "_tps_entre_repro", "_portee_max"]
 NB_GENES = len(GENES)
+RANGS_GENES = range(NB_GENES)
+# Le choix d'héritage des gènes est un masque de NB_GENES bits (bit i levé :
+# gène i hérité du partenaire). Les masques 0 et 2**NB_GENES - 1, où tous
+# les gènes viennent du même parent, sont exclus.
+MASQUE_HERITAGE_MAX = (1 << NB_GENES) - 2
 PROBA_MUTATION = 0.05
+ECART_TYPE_MUTATION = 0.05
 
 POURCENTAGE_SANTE_FAIBLE = 0.2
 POURCENTAGE_PV_ENFANT = 0.5
 NB_REPAS_AFFAME = 3
 
+# Code entier de chaque espèce rencontrée, attribué au premier insecte de
+# l'espèce. Les comparaisons d'espèces se font sur ces codes.
+CODES_ESPECES = {}
+
 
 class Insecte(EntiteParcelle):
     """Insecte vivant sur une parcelle."""
 
+    # Les insectes sont nombreux : pas de __dict__, on ne peut donc pas leur
+    # ajouter d'attribut en dehors de ceux-ci.
+    __slots__ = ("_espece", "_code_espece", "_sexe", "_pv_max",
+                 "_esperance_vie", "_mobilite", "_resistance",
+                 "_tps_entre_repro", "_portee_max", "_rang",
+                 "_derniere_repro", "_dernier_repas", "_repas_consecutifs",
+                 "_maturite", "_pv", "_seuil_sante_faible")
+
     def __init__(self, espece: str, sexe: bool,
                  pv_max: int, esperance_vie: int,
                  mobilite: float, resistance: float,
@@ -36,6 +54,8 @@ class Insecte(EntiteParcelle):
             self._espece = str(espece)
         except ValueError as exc:
             raise TypeError("espece doit être un str") from exc
+        self._code_espece = CODES_ESPECES.setdefault(self._espece,
+                                                     len(CODES_ESPECES))
 
         # Définition du sexe
         try:
@@ -101,11 +121,17 @@ class Insecte(EntiteParcelle):
             raise ValueError("portee_max doit être supérieur"
                              + " ou égal à 0.")
 
+        # Rang de l'insecte dans la liste des insectes de sa parcelle
+        self._rang = None
+
         # Définition des valeurs d'historique
         self._derniere_repro = inf
         self._dernier_repas = inf
         self._repas_consecutifs = 0
 
+        # PV en dessous desquels l'insecte est en mauvaise santé
+        self._seuil_sante_faible = self._pv_max * POURCENTAGE_SANTE_FAIBLE
+
         if enfant:  # Cas où l'insecte est généré par reproduction
             self._maturite = self._tps_entre_repro * 2
             self._pv = max(1, int(self._pv_max * POURCENTAGE_PV_ENFANT))
@@ -113,6 +139,37 @@ class Insecte(EntiteParcelle):
             self._maturite = 0
             self._pv = self._pv_max
 
+    @classmethod
+    def _enfant(cls, espece: str, code_espece: int, sexe: bool,
+                pv_max: int, esperance_vie: int,
+                mobilite: float, resistance: float,
+                tps_entre_repro: int, portee_max: int):
+        """Crée un insecte né par reproduction, sans validation.
+
+        Les paramètres doivent déjà avoir le bon type et être normalisés,
+        comme le fait reproduire. Équivaut à
+        Insecte(..., enfant=True) sans les conversions ni les vérifications.
+        """
+        insecte = cls.__new__(cls)
+        EntiteParcelle.__init__(insecte)
+        insecte._espece = espece
+        insecte._code_espece = code_espece
+        insecte._sexe = sexe
+        insecte._pv_max = pv_max
+        insecte._esperance_vie = esperance_vie
+        insecte._mobilite = mobilite
+        insecte._resistance = resistance
+        insecte._tps_entre_repro = tps_entre_repro
+        insecte._portee_max = portee_max
+        insecte._rang = None
+        insecte._derniere_repro = inf
+        insecte._dernier_repas = inf
+        insecte._repas_consecutifs = 0
+        insecte._seuil_sante_faible = pv_max * POURCENTAGE_SANTE_FAIBLE
+        insecte._maturite = tps_entre_repro * 2
+        insecte._pv = max(1, int(pv_max * POURCENTAGE_PV_ENFANT))
+        return insecte
+
     # Getters des attributs
 
     @property
@@ -131,7 +188,10 @@ class Insecte(EntiteParcelle):
         return self._sexe
 
     def survivre(self) -> bool:
-        """Détermine si l'insecte meurt à ce tour. SI oui, le tue.
+        """Détermine si l'insecte meurt à ce tour.
+
+        Renvoie Vrai si l'insecte meurt : la parcelle le retire alors de ses
+        insectes en une seule passe (voir Parcelle.update_insectes).
 
         L'insecte meurt SI:
             Il n'a plus de points de vie;
@@ -139,26 +199,24 @@ class Insecte(EntiteParcelle):
                à l'insecticide sur la parcelle si il y en a;
             OU Son espérance de vie est écoulée;
         """
-        mort = False
-        if self._pv <= 0:
-            if self.potager.loglevel >= 2:
-                print(f"{self} ✝ faim")
-            mort = True
         try:
-            if self._parcelle.insecticide > 0:  # Insecticide présent
-                if random() > self._resistance:
-                    if self.potager.loglevel >= 2:
-                        print(f"{self} ✝ insecticide")
-                    mort = True
+            # Insecticide présent et non résisté
+            empoisonne = (self._parcelle.insecticide > 0
+                          and random() > self._resistance)
         except AttributeError as exc:
             raise UnboundLocalError("La parcelle doit être définie pour"
                                     + " l'insecte.") from exc
-        if self.age > self._esperance_vie:
-            if self.potager.loglevel >= 2:
+        faim = self._pv <= 0
+        vieux = self._age > self._esperance_vie
+        mort = faim | empoisonne | vieux
+        if mort and self._loglevel >= 2:
+            if faim:
+                print(f"{self} ✝ faim")
+            if empoisonne:
+                print(f"{self} ✝ insecticide")
+            if vieux:
                 print(f"{self} ✝ age")
-            mort = True
-        if mort:
-            self.parcelle._insectes.remove(self)
+        return mort
 
     def se_nourrir(self) -> bool:
         """Gestion du nourrisage de l'insecte.
@@ -171,7 +229,7 @@ class Insecte(EntiteParcelle):
         Renvoie Vrai si l'insecte a pu se nourrir. Faux sinon.
         """
         try:
-            if len(self._parcelle.plantes) > 0:  # Au moins une plante
+            if self._parcelle._plantes:  # Au moins une plante
                 # L'insecte se nourrit
                 self._dernier_repas = 0
                 self._repas_consecutifs += 1
@@ -196,23 +254,28 @@ class Insecte(EntiteParcelle):
         récemment ET SI il est adulte.
         """
         return (self._derniere_repro > self._tps_entre_repro
-                and self.age >= self._maturite and self._dernier_repas < 3)
+                and self._age >= self._maturite and self._dernier_repas < 3)
 
     def partenaires(self) -> list:
-        """Renvoie la liste des partenaires valides pour l'insecte."""
-        # Vérification qu'il y a d'autres insectes sur la parcelle
+        """Renvoie la liste des partenaires valides pour l'insecte.
+
+        La liste est copiée depuis l'index des insectes disponibles de la
+        parcelle (voir Parcelle.indexer_partenaires).
+        """
         try:
-            return [i for i
-                    in self._parcelle.insectes
-                    if (i.disponible and i.sexe != self.sexe
-                        and i.espece == self.espece)]
+            return list(self._parcelle._partenaires.get(
+                (self._code_espece, not self._sexe), ()))
         except AttributeError:
             return []
 
     @staticmethod
     def mutation(gene) -> (float, int):
-        """Renvoie le gène mutée par la loi de probabilité."""
-        return normalvariate(gene, 0.05)
+        """Renvoie le gène mutée par la loi de probabilité.
+
+        Utilise random.gauss, qui tire les valeurs normales par paires,
+        plutôt que random.normalvariate.
+        """
+        return gauss(gene, ECART_TYPE_MUTATION)
 
     def reproduire(self):
         """Reproduction de l'insecte.
@@ -224,52 +287,55 @@ class Insecte(EntiteParcelle):
         """
         self._derniere_repro += 1
         if not self.disponible:  # L'insecte n'est pas disponible
-            if self.potager.loglevel >= 2:
+            if self._loglevel >= 2:
                 print(f"{self} 🟥")
             return []
-        partenaires = self.partenaires()
-        if partenaires == []:  # Pas de partenaire trouvé
-            if self.potager.loglevel >= 2:
+        parcelle = self._parcelle
+        # L'insecte est disponible : il est indexé s'il ne l'était pas déjà
+        parcelle.ajouter_partenaire(self)
+        # On choisit un partenaire au hasard, retiré de l'index
+        partenaire = parcelle.tirer_partenaire(self._code_espece,
+                                               not self._sexe)
+        if partenaire is None:  # Pas de partenaire trouvé
+            if self._loglevel >= 2:
                 print(f"{self} 💦")
             return []
-        # On en choisit un au hasard
-        partenaire = choice(partenaires)
         # Génération aléatoire de la taille de la portée
         t_portee = randint(1, partenaire.portee_max)
-        parents_dict = (self.__dict__, partenaire.__dict__)
+        # Gènes des deux parents, lus une seule fois pour toute la portée
+        genes_parents = (tuple(getattr(self, gene) for gene in GENES),
+                         tuple(getattr(partenaire, gene) for gene in GENES))
+        mutation = self.mutation
+        espece = self._espece
 
         self._derniere_repro, partenaire._derniere_repro = 0, 0
+        # L'insecte n'est plus disponible non plus
+        parcelle.retirer_partenaire(self)
         portee = []
         for _ in range(t_portee):
             # Choix des gènes de chaque enfant de la portée
-            ind = [0]*NB_GENES  # Liste des choix d'héritage des gènes
-            while ind in ([0]*NB_GENES, [1]*NB_GENES):
-                ind = [randint(0, 1) for i in range(NB_GENES)]
-            # Dictionnaire contenant les caractéristiques
-            # de l'enfant qui va naître
-            enf = {}
-            for i, gene in enumerate(GENES):
-                enf[gene] = parents_dict[ind[i]][gene]
+            masque = randint(1, MASQUE_HERITAGE_MAX)
+            # Liste contenant les caractéristiques
+            # de l'enfant qui va naître, dans l'ordre de GENES
+            enf = [genes_parents[(masque >> i) & 1][i] for i in RANGS_GENES]
             # Mutation
             if random() < PROBA_MUTATION:
                 # On choisit un des gènes à muter
-                gene_mute = choice(GENES)
+                i_mute = choice(RANGS_GENES)
                 # On mute le gène selon la loi de probabilité de mutation()
-                enf[gene_mute] = self.mutation(enf[gene_mute])
-            enf["sexe"] = bool(randint(0, 1))
-            # Normalisation des valeurs
-            enf["_pv_max"] = int(max(1, enf["_pv_max"]))
-            enf["_esperance_vie"] = int(max(1, enf["_esperance_vie"]))
-            enf["_mobilite"] = float(min(1, max(0, enf["_mobilite"])))
-            enf["_resistance"] = float(min(1, max(0, enf["_resistance"])))
-            enf["_tps_entre_repro"] = int(max(0, enf["_tps_entre_repro"]))
-            enf["_portee_max"] = int(max(0, enf["_portee_max"]))
-            # Création de l'insecte
-            portee.append(Insecte(self.espece, enf["sexe"], enf["_pv_max"],
-                          enf["_esperance_vie"], enf["_mobilite"],
-                          enf["_resistance"], enf["_tps_entre_repro"],
-                          enf["_portee_max"], True))
-        if self.potager.loglevel >= 1:
+                enf[i_mute] = mutation(enf[i_mute])
+            sexe = bool(randint(0, 1))
+            (pv_max, esperance_vie, mobilite,
+             resistance, tps_entre_repro, portee_max) = enf
+            # Création de l'insecte avec normalisation des valeurs
+            portee.append(Insecte._enfant(espece, self._code_espece, sexe,
+                                          int(max(1, pv_max)),
+                                          int(max(1, esperance_vie)),
+                                          float(min(1, max(0, mobilite))),
+                                          float(min(1, max(0, resistance))),
+                                          int(max(0, tps_entre_repro)),
+                                          int(max(0, portee_max))))
+        if self._loglevel >= 1:
             print(f"{self} ♥ {t_portee}")
         return portee
 
@@ -285,15 +351,15 @@ class Insecte(EntiteParcelle):
         proba_mobilite = self._mobilite
         if self._dernier_repas >= NB_REPAS_AFFAME:  # L'insecte est affamé
             proba_mobilite *= 2
-        if self._pv < (self._pv_max * POURCENTAGE_SANTE_FAIBLE):
+        if self._pv < self._seuil_sante_faible:
             # L'insecte a une santé faible
             proba_mobilite /= 2
         if random() < proba_mobilite:  # L'insecte essaie de bouger
             try:
-                voisin = self.parcelle.voisinerandom()
+                voisin = self._parcelle.voisinerandom()
                 if voisin is None:  # Pas de parcelle voisine
                     return False
-                if self.potager.loglevel >= 3:
+                if self._loglevel >= 3:
                     print(f"{self} → {voisin}")
                 voisin.accueillir(self)
             except AttributeError as exc:
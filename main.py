@@ -13,24 +13,46 @@ Ce fichier contient le code de l'interface.
 import tkinter as tk
 from tkinter import Menu, ttk
 from tkinter import filedialog, messagebox
+from functools import cached_property
 import matplotlib.pyplot as plt
 import math
+import queue
+import threading
 import xml.etree.ElementTree as ET
 # Import des modules internes
 from potager import Potager
+from insecte import CODES_ESPECES
 
 VERSION = "0.0.6"
 TITLE_STR = f"Plantes contre Insectes v{VERSION}"
 DELAI_STD = 10  # millisecondes
+DELAI_RELEVE = 50  # millisecondes entre deux relevés du calcul en fond
 LARGEUR_TUILE = 32
 LONGUEUR_TUILE = 32
 LARGEUR_WIN_MIN = 315
 LONGUEUR_WIN_MIN = 80
 SEUIL_AFF_BAR = 0.01
-FREQ_ACTU_MAINFRAME = 1
+# Épaisseur en pixels des barres de surface et d'humidité, et de la barre
+# d'insectes
+EPAISSEUR_BARRE = 3
+EPAISSEUR_BARRE_INSECTES = 2
+# Pixels de barre d'insectes par unité de log(1 + nombre d'insectes)
+ECHELLE_BARRE_INSECTES = LONGUEUR_TUILE / 4
+# Longueur en pixels de la barre d'insectes selon leur nombre. La table
+# s'arrête dès que la barre atteint la largeur d'une tuile : au-delà, la
+# barre occupe toute la tuile.
+LONGUEURS_BARRE_INSECTES = tuple(
+    min(int(math.log1p(n) * ECHELLE_BARRE_INSECTES), LONGUEUR_TUILE)
+    for n in range(int(math.expm1(LONGUEUR_TUILE
+                                  / ECHELLE_BARRE_INSECTES)) + 2))
 AUTO_INFO = False
 
 
+def _sprite(chemin: str) -> cached_property:
+    """Sprite de l'interface, lu depuis chemin à sa première utilisation."""
+    return cached_property(lambda interface: tk.PhotoImage(file=chemin))
+
+
 class Interface(tk.Tk):
     """Interface de l'application.
 
@@ -68,11 +90,28 @@ class Interface(tk.Tk):
         Les barres de surface totale prise sont visibles lorsque tk.NORMAL.
     _aff_b_insectes = tk.NORMAL : str
         Les barres de quantités d'insectes sont visibles lorsque tk.NORMAL.
-    _actu_compteur = 0 : int
-        Compteur pour la mise à jour de l'interface en avance automatique.
-    _T_nb_insectes = [] : list[Counter(str, int)]
-        Liste de Counter contenant la population d'insectes par espèce à
-        chaque pas.
+    _case_curseur = None : tuple[int, int]
+        Tuile sur laquelle le curseur interne est affiché.
+    _maj_en_attente = False : bool
+        Vrai si une mise à jour du cadre principal est déjà planifiée.
+    _calcul = None : threading.Thread
+        Thread qui calcule les pas restants lancé par dernier_pas, None si
+        aucun calcul n'est en cours. Tant qu'il tourne, le potager ne doit
+        pas être lu depuis l'interface (voir _calcul_en_cours).
+    _arret_calcul = None : threading.Event
+        Évènement qui demande au thread _calcul de s'arrêter.
+    _T_nb_insectes = [] : list[list[int]]
+        Population d'insectes à chaque pas, relevée par
+        Potager.releve_insectes : une ligne par pas, une colonne par code
+        d'espèce.
+    _etat_barres = [] : list[tuple]
+        Dernier état affiché des barres et du dispositif de chaque parcelle,
+        None si la parcelle doit être redessinée.
+    _ids_dispos = [] : list[int]
+        Éléments de canvas des dispositifs du potager.
+    _cases = [] : list[tuple]
+        Indice dans les grilles de entites_id et coordonnées des barres de
+        chaque parcelle, dans l'ordre de Potager.snapshot.
 """
 
     def __init__(self):
@@ -86,7 +125,6 @@ class Interface(tk.Tk):
         self.title(TITLE_STR)
 
         # = Barre de progression =
-        self.load_frame_assets()
         barre_pas = tk.Frame(self, bd=1, height=2,
                              relief=tk.RAISED)
         barre_pas.pack(side="top", fill="none", anchor=tk.CENTER)
@@ -235,16 +273,27 @@ class Interface(tk.Tk):
         self.delai = DELAI_STD
         self.par_cur = None
         self.fichier_cur = None
+        self.tile_cursor = None
 
         self._aff_dispos = tk.NORMAL
         self._aff_humid = tk.NORMAL
         self._aff_b_plantes = tk.NORMAL
         self._aff_b_insectes = tk.NORMAL
-        self._actu_compteur = 0
+        self._maj_en_attente = False
+        self._calcul = None
+        self._arret_calcul = None
+        self._case_curseur = None
         self._T_nb_insectes = []
+        self._etat_barres = []
+        self._cases = []
+        self._ids_dispos = []
 
     def charger(self) -> bool:
         """Charge un potager."""
+        # Refusé pendant un calcul : les résultats à exporter ne sont pas
+        # encore prêts et seraient perdus avec l'ancien potager
+        if self._calcul_en_cours():
+            return False
         if self.potager:  # Demande de confirmation si un potager est en cours
             sauv = messagebox.askyesno(parent=self,
                                        title="Confirmation d'ouverture",
@@ -264,7 +313,7 @@ class Interface(tk.Tk):
         else:
             print(f"Fichier {fichier_cur} chargé.")
             self.set_canvas()
-            self._T_nb_insectes = [self.potager.nb_insectes]
+            self._T_nb_insectes = [self.potager.releve_insectes()]
             self.lecture = False
             self.termine = False
             self.n_pas = 0
@@ -272,6 +321,8 @@ class Interface(tk.Tk):
 
     def recharger(self) -> bool:
         """Recharge le potager associé au fichier censé être ouvert."""
+        if self._calcul_en_cours():
+            return False  # Le calcul en cours ne doit pas être perdu
         fichier_cur = self.fichier_cur
         if fichier_cur:
             try:
@@ -282,7 +333,7 @@ class Interface(tk.Tk):
             else:
                 print(f"Fichier {fichier_cur} rechargé.")
                 self.set_canvas()
-                self._T_nb_insectes = [self.potager.nb_insectes]
+                self._T_nb_insectes = [self.potager.releve_insectes()]
                 self.lecture = False
                 self.termine = False
                 self.n_pas = 0
@@ -291,21 +342,44 @@ class Interface(tk.Tk):
             print("Aucun fichier chargé !")
 
     def sauvegarder(self) -> bool:
-        """Exporte les résultats à un emplacement à déterminer."""
+        """Exporte les résultats à un emplacement à déterminer.
+
+        Les résultats sont relevés ici, puis le fichier XML est construit et
+        écrit dans un thread pour ne pas bloquer l'interface.
+        """
+        if self._calcul_en_cours():
+            return False
         fichier_cur = filedialog.asksaveasfilename(filetypes=(("Fichier_XML {.xml}", "Fichier {*}")))
         self.fichier_cur = fichier_cur
+        if not fichier_cur:  # Si aucun fichier n'a été choisi
+            return False
+        # Seuls les n_pas premiers relevés de population sont exportés
+        threading.Thread(target=self._exporter,
+                         args=(fichier_cur,
+                               self.potager.recolte_par_especes(),
+                               self._T_nb_insectes[:self.n_pas],
+                               list(CODES_ESPECES))).start()
+        return True
+
+    @staticmethod
+    def _exporter(fichier: str, recoltes: dict, releves: list,
+                  especes: list) -> None:
+        """Écrit les résultats dans un fichier XML (exécuté dans un thread).
+
+        especes donne le nom de l'espèce de chaque code des relevés.
+        """
         tronc = ET.Element('Resultats')
         arbreXML = ET.ElementTree(tronc)
-        format_recoltes = dict([(i[0], str(i[1])) for i in self.potager.recolte_par_especes().items()])
-        tronc.append(ET.Element("Recolte",format_recoltes))
-        T_format_nb_insectes = [dict([(i[0], str(i[1])) for i in j.items()]) for j in self._T_nb_insectes]
-        for i in range(self.n_pas):
-            pasXML = ET.Element("pas",{"n":str(i)})
-
-            pasXML.append(ET.Element("Population", T_format_nb_insectes[i]))
-            tronc.append(pasXML)
+        format_recoltes = {espece: str(n) for espece, n in recoltes.items()}
+        ET.SubElement(tronc, "Recolte", format_recoltes)
+        # Chaque élément est construit directement depuis son relevé
+        for i, releve in enumerate(releves):
+            pasXML = ET.SubElement(tronc, "pas", {"n": str(i)})
+            ET.SubElement(pasXML, "Population",
+                          {nom: str(n) for nom, n in zip(especes, releve)
+                           if n})
         ET.indent(tronc)
-        arbreXML.write(fichier_cur)
+        arbreXML.write(fichier)
 
     def apropos(self) -> None:
         """Affiche les informations du programme dans une Infobox."""
@@ -358,7 +432,6 @@ class Interface(tk.Tk):
             self.menu_sim.entryconfig(1, label="Pause")
             self.bt_play.config(image=self._img_bp_pause)
             print("Lecture...")
-            self.actu_compteur = 0
         self.pas()
 
     def toggleAffDispos(self) -> None:
@@ -373,6 +446,8 @@ class Interface(tk.Tk):
 
     def montrer_recolte(self) -> None:
         """Montre dans un graphique la récolte."""
+        if self._calcul_en_cours():
+            return
         print(self.potager.recolte)
         recolte_especes = self.potager.recolte_par_especes()
         if not recolte_especes:
@@ -382,75 +457,119 @@ class Interface(tk.Tk):
 
     def update_mainframe(self) -> None:
         """Met à jour le cadre principal du programme."""
-        self.update_barres()
-        self.update_dispos()
+        self.update_cases()
 
-    def update_barres(self) -> None:
-        """Met à jour les barres d'information de chaque parcelle."""
-        for i in range(self.potager.longueur):
-            for j in range(self.potager.largeur):
-                if self.potager.parcelles[i][j]:
-                    # Pour chaque parcelle du potager :
-                    par = self.potager.parcelles[i][j]
-
-                    # Affichage des barres de surface
-                    self.maincanvas.coords(self.entites_id["lignes_surf"][i][j],
-                        (i * LONGUEUR_TUILE + 2, j * LARGEUR_TUILE + 2,
-                         i * LONGUEUR_TUILE + 2 + int(par.surface_totale
-                                                       * LONGUEUR_TUILE),
-                         j * LARGEUR_TUILE + 5))
-                    etat = tk.NORMAL if par.surface_totale >= SEUIL_AFF_BAR else tk.HIDDEN
-                    self.maincanvas.itemconfig(self.entites_id["lignes_surf"][i][j],
-                                               state=etat and self._aff_b_plantes)
-
-                    # Affichage des barres d'humidité
-                    self.maincanvas.coords(self.entites_id["lignes_humid"][i][j],
-                        (i * LONGUEUR_TUILE + 2, j * LARGEUR_TUILE + 5,
-                         i * LONGUEUR_TUILE + 2 + par.humidite
-                         * LONGUEUR_TUILE, j * LARGEUR_TUILE + 8))
-                    etat = tk.NORMAL if par.humidite >= SEUIL_AFF_BAR else tk.HIDDEN
-                    self.maincanvas.itemconfig(self.entites_id["lignes_humid"][i][j],
-                                               state=etat and self._aff_humid)
-
-                    # TODO : Indicateur de status des dispositifs
-
-                    # Affichage des barres d'insecte
-                    self.maincanvas.coords(self.entites_id["barres_insecte"][i][j],
-                        (i * LONGUEUR_TUILE + 2,
-                         j * LARGEUR_TUILE + 8,
-                         i * LONGUEUR_TUILE + 2
-                         + int(math.log(1+sum(list(par.nb_insectes.values())))
-                               / 4 * LONGUEUR_TUILE),
-                         j * LARGEUR_TUILE + 10))
-                    self.maincanvas.itemconfig(self.entites_id["barres_insecte"][i][j],
-                                               state=self._aff_b_insectes)
+    def update_cases(self) -> None:
+        """Met à jour l'affichage de chaque parcelle en une seule passe.
+
+        Les barres d'information et le dispositif de chaque parcelle sont
+        traités dans la même boucle, et toutes les commandes sont regroupées
+        dans un seul script Tcl, évalué en une fois au lieu d'un appel par
+        commande. Seules les parcelles dont l'état affiché a changé depuis la
+        dernière mise à jour sont redessinées.
+        """
+        c = str(self.maincanvas)  # Chemin Tcl du canvas
+        script = []
+        ajouter = script.append  # Méthode liée, résolue une seule fois
+        aff_b_plantes = self._aff_b_plantes
+        aff_humid = self._aff_humid
+        aff_b_insectes = self._aff_b_insectes
+        aff_dispos = self._aff_dispos
+        etats = self._etat_barres
+        ids_surf = self.entites_id["lignes_surf"]
+        ids_humid = self.entites_id["lignes_humid"]
+        ids_insecte = self.entites_id["barres_insecte"]
+        ids_dispos = self.entites_id["dispositifs"]
+        # Chaque barre est un segment : seule son extrémité droite varie.
+        # self._cases et l'instantané suivent tous deux l'ordre des parcelles
+        for case, releve in zip(self._cases, zip(*self.potager.snapshot())):
+            k, x, y_surf, y_humid, y_insecte = case
+            surface, humidite, n_insectes = releve
+            etat_barres = (surface, humidite, n_insectes, aff_b_plantes,
+                           aff_humid, aff_b_insectes, aff_dispos)
+            if etat_barres == etats[k]:
+                continue  # Barres déjà à jour sur le canvas
+            etats[k] = etat_barres
+
+            # Affichage des barres de surface
+            id_barre = ids_surf[k]
+            etat = tk.NORMAL if surface >= SEUIL_AFF_BAR else tk.HIDDEN
+            longueur = int(surface * LONGUEUR_TUILE)
+            ajouter(f"{c} coords {id_barre} {x} {y_surf}"
+                    f" {x + longueur} {y_surf}")
+            ajouter(f"{c} itemconfigure {id_barre} -state"
+                    f" {etat and aff_b_plantes}")
+
+            # Affichage des barres d'humidité
+            id_barre = ids_humid[k]
+            etat = tk.NORMAL if humidite >= SEUIL_AFF_BAR else tk.HIDDEN
+            longueur = humidite * LONGUEUR_TUILE
+            ajouter(f"{c} coords {id_barre} {x} {y_humid}"
+                    f" {x + longueur} {y_humid}")
+            ajouter(f"{c} itemconfigure {id_barre} -state"
+                    f" {etat and aff_humid}")
+
+            # TODO : Indicateur de status des dispositifs
+            if ids_dispos[k] is not None:
+                ajouter(f"{c} itemconfigure {ids_dispos[k]}"
+                        f" -state {aff_dispos}")
+
+            # Affichage des barres d'insecte
+            id_barre = ids_insecte[k]
+            # La barre ne déborde pas sur la tuile voisine
+            if n_insectes < len(LONGUEURS_BARRE_INSECTES):
+                longueur = LONGUEURS_BARRE_INSECTES[n_insectes]
+            else:
+                longueur = LONGUEUR_TUILE
+            ajouter(f"{c} coords {id_barre} {x} {y_insecte}"
+                    f" {x + longueur} {y_insecte}")
+            ajouter(f"{c} itemconfigure {id_barre} -state {aff_b_insectes}")
+        # Une seule entrée dans l'interpréteur Tcl pour tout le potager
+        self.tk.eval("\n".join(script))
 
     def update_dispos(self):
-        """Met à jour l'état de l'affichage des dispositifs."""
-        for i in range(self.potager.longueur):
-            for j in range(self.potager.largeur):
-                if not self.potager.parcelles[i][j]:
-                    continue
-                par = self.potager.parcelles[i][j]
-                if par.dispositif is None:
-                    continue
-                self.maincanvas.itemconfig(self.entites_id["dispositifs"][i][j],
-                                           state=self._aff_dispos)
+        """Met à jour l'état de l'affichage des dispositifs seulement.
+
+        Utilisé lorsque seul l'affichage des dispositifs change : seuls les
+        éléments de self._ids_dispos sont parcourus, et leurs commandes sont
+        envoyées à Tcl en un seul script.
+        """
+        c = str(self.maincanvas)  # Chemin Tcl du canvas
+        self.tk.eval("\n".join(f"{c} itemconfigure {id_dispo}"
+                                f" -state {self._aff_dispos}"
+                                for id_dispo in self._ids_dispos))
 
     def set_canvas(self):
         """Charge le canvas montrant le potager."""
-        # Chargement des sprites
-        self.load_assets()
+        if self._calcul_en_cours():
+            return
         self.title(f"{self.potager.nom_potager} - {TITLE_STR}")
         # Liste des clés des entités pour chaque parcelle sur le canvas
-        self.el_canvas = ["parcelles", "lignes_surf", "lignes_humid",
+        self.el_canvas = ["lignes_surf", "lignes_humid",
                           "dispositifs", "barres_insecte"]
         # Liste des éléments de canvas actualisés et correspondant au dict
-        # self.entites_id
-        self.entites_id = dict([(i, ([[None
-                               for j in range(self.potager.largeur)]
-                               for i in range(self.potager.longueur)]))
+        # self.entites_id. Chaque grille est une liste plate : la case (i, j)
+        # est à l'indice i * largeur + j.
+        n_cases = self.potager.longueur * self.potager.largeur
+        self.entites_id = dict([(i, [None] * n_cases)
                                for i in self.el_canvas])
+        # Dernier état affiché des barres de chaque parcelle (None : à
+        # redessiner), indicé comme self.entites_id
+        self._etat_barres = [None] * n_cases
+        # Parcelles du potager, dans l'ordre de Potager.snapshot, avec leur
+        # indice et les coordonnées de leurs barres
+        self._cases = []
+        # Éléments de canvas des dispositifs, seuls concernés par
+        # update_dispos
+        self._ids_dispos = []
+        # Abscisse des barres de chaque colonne, et pour chaque ligne
+        # l'ordonnée du haut de la tuile puis celles de l'axe des barres de
+        # surface, d'humidité et d'insectes, calculées une fois pour toutes
+        self._x_barres = [i * LONGUEUR_TUILE + 2
+                          for i in range(self.potager.longueur)]
+        self._y_barres = [(j * LARGEUR_TUILE + 2, j * LARGEUR_TUILE + 3.5,
+                           j * LARGEUR_TUILE + 6.5, j * LARGEUR_TUILE + 9)
+                          for j in range(self.potager.largeur)]
         c = self.maincanvas  # Raccourci
 # =============================================================================
 #       On définit les dimensions de la fenêtre et du cadre pour que la
@@ -461,58 +580,70 @@ class Interface(tk.Tk):
                      LONGUEUR_WIN_MIN + self.potager.largeur * LARGEUR_TUILE)
         c.config(height=self.potager.largeur * LARGEUR_TUILE,
                  width=self.potager.longueur * LONGUEUR_TUILE)
-        # On initialise chaque case du canvas grâce au potager
+        c.delete(tk.ALL)  # On repart d'un canvas vide à chaque chargement
+# =============================================================================
+#       Les tuiles du sol ne changent pas pendant la simulation : elles sont
+#       copiées une fois pour toutes dans une seule image de fond, plutôt que
+#       d'avoir un élément de canvas par parcelle.
+# =============================================================================
+        self._img_fond = tk.PhotoImage(
+            master=self, width=self.potager.longueur * LONGUEUR_TUILE,
+            height=self.potager.largeur * LARGEUR_TUILE)
+        script = []
         for i in range(self.potager.longueur):
+            colonne = self.potager.parcelles[i]
             for j in range(self.potager.largeur):
-                if self.potager.parcelles[i][j]:
-                    par = self.potager.parcelles[i][j]
+                tuile = (self._img_parcelle_s if colonne[j]
+                         else self._img_defaut)
+                script.append(f"{self._img_fond} copy {tuile}"
+                              f" -to {i * LONGUEUR_TUILE} {j * LARGEUR_TUILE}")
+        self.tk.eval("\n".join(script))
+        c.create_image((2, 2), image=self._img_fond, anchor="nw")
+        # Méthodes du canvas, résolues une seule fois pour toute la boucle
+        creer_image = c.create_image
+        creer_ligne = c.create_line
+        # On initialise chaque case du canvas grâce au potager
+        largeur = self.potager.largeur
+        ids_dispos = self.entites_id["dispositifs"]
+        ids_surf = self.entites_id["lignes_surf"]
+        ids_humid = self.entites_id["lignes_humid"]
+        ids_insecte = self.entites_id["barres_insecte"]
+        for i in range(self.potager.longueur):
+            x = self._x_barres[i]
+            colonne = self.potager.parcelles[i]
+            for j in range(largeur):
+                par = colonne[j]
+                if par:
+                    k = i * largeur + j
                     # Il y a une parcelle à cet endroit du potager
-                    self.entites_id["parcelles"][i][j] = c.create_image(
-                        (i * LONGUEUR_TUILE + 2,
-                         j * LARGEUR_TUILE + 2),
-                        image=self._img_parcelle_s, anchor="nw")
+                    y_tuile, y_surf, y_humid, y_insecte = self._y_barres[j]
+                    self._cases.append((k, x, y_surf, y_humid, y_insecte))
                     # Affichage des dispositifs
                     if par.dispositif is not None:
                         portee = par.dispositif.portee
                         portee_aff = min(portee - 1, 2)
-                        self.entites_id["dispositifs"][i][j] = c.create_image(
-                            (i * LONGUEUR_TUILE + 2,
-                             j * LARGEUR_TUILE + 2),
+                        ids_dispos[k] = creer_image(
+                            (x, y_tuile),
                             image=self._imgs_sprk[portee_aff], anchor="nw",
                             state=self._aff_dispos)
-                    # Affichage des barres de surface
-                    self.entites_id["lignes_surf"][i][j] = c.create_rectangle(
-                         (i * LONGUEUR_TUILE + 2,
-                          j * LARGEUR_TUILE + 2,
-                          i * LONGUEUR_TUILE + 2 + int(par.surface_totale
-                                                       * LONGUEUR_TUILE),
-                          j * LARGEUR_TUILE + 4),
-                         fill="green", state=self._aff_b_plantes)
-                    # Affichage des barres d'humidité
-                    self.entites_id["lignes_humid"][i][j] = c.create_rectangle(
-                        (i * LONGUEUR_TUILE + 2,
-                         j * LARGEUR_TUILE + 6,
-                         i * LONGUEUR_TUILE + 2 + par.humidite * LONGUEUR_TUILE,
-                         j * LARGEUR_TUILE + 8),
-                        fill="blue", state=self._aff_humid)
-                    # Affichage des insectes
-                    self.entites_id["barres_insecte"][i][j] = c.create_rectangle(
-                        (i * LONGUEUR_TUILE + 2,
-                         j * LARGEUR_TUILE + 8,
-                         i * LONGUEUR_TUILE + 2
-                         + int(math.log(1+sum(list(par.nb_insectes.values())))
-                               / 3 * LONGUEUR_TUILE),
-                         j * LARGEUR_TUILE + 10),
-                        fill="red", state=self._aff_b_insectes)
-                else:
-                    # Affichage des tuiles vides
-                    self.entites_id["parcelles"][i][j] = c.create_image(
-                        (i * LONGUEUR_TUILE + 2,
-                         j * LARGEUR_TUILE + 2),
-                        image=self._img_defaut, anchor="nw")
+                        self._ids_dispos.append(ids_dispos[k])
+                    # Barres de surface, d'humidité et d'insectes : des
+                    # segments horizontaux épais de longueur nulle, que
+                    # update_cases dimensionne
+                    ids_surf[k] = creer_ligne(
+                        (x, y_surf, x, y_surf), fill="green",
+                        width=EPAISSEUR_BARRE, state=self._aff_b_plantes)
+                    ids_humid[k] = creer_ligne(
+                        (x, y_humid, x, y_humid), fill="blue",
+                        width=EPAISSEUR_BARRE, state=self._aff_humid)
+                    ids_insecte[k] = creer_ligne(
+                        (x, y_insecte, x, y_insecte), fill="red",
+                        width=EPAISSEUR_BARRE_INSECTES,
+                        state=self._aff_b_insectes)
         # Affichage du curseur
         self.tile_cursor = c.create_image((0, 0),
                                           image=self._img_cursor, anchor="nw")
+        self._case_curseur = None  # Curseur pas encore placé sur une tuile
         self.update_mainframe()
 
     def update_canvas_move(self, event):
@@ -532,28 +663,30 @@ class Interface(tk.Tk):
             self.par_cur = self.potager.parcelles[self.par_x][self.par_y]
             if AUTO_INFO:
                 self.info_parcelle()
-        if self.tile_cursor:
-            # Déplacer le curseur sur la parcelle sélectionnée
-            self.maincanvas.moveto(self.tile_cursor,
-                                   self.par_x * LONGUEUR_TUILE + 2,
-                                   self.par_y * LARGEUR_TUILE + 2)
+        case = (self.par_x, self.par_y)
+        if self.tile_cursor is None or case == self._case_curseur:
+            return  # Le curseur est déjà sur cette tuile
+        self._case_curseur = case
+        # Déplacer le curseur sur la parcelle sélectionnée
+        self.maincanvas.moveto(self.tile_cursor,
+                               self.par_x * LONGUEUR_TUILE + 2,
+                               self.par_y * LARGEUR_TUILE + 2)
 
     def info_parcelle(self) -> None:
         """Affiche les informations de la parcelle."""
+        if self._calcul_en_cours():
+            return
         if self.par_cur:
             # Il y a une parcelle à cet endroit
-            print(f"""Parcelle X{self.par_x} Y{self.par_y}\t
-                  {self.par_cur.humidite}\t
-                  {len(self.par_cur.insectes)}""", end="")
+            lignes = [f"Parcelle X{self.par_x} Y{self.par_y}"
+                      f"\t{self.par_cur.humidite}"
+                      f"\t{self.par_cur.n_insectes}"]
             if self.par_cur.dispositif is not None:
                 # Il y a un dispositif sur la parcelle
-                print(f"""\t\t D{self.par_cur.dispositif.portee}""")
-            else:
-                print("")
-            aff_plantes = [
-                print(f"""{p.espece}\t{p.surface_parcelle}\t{p.age}""")
-                for p in self.par_cur.plantes
-                          ]
+                lignes[0] += f"\t\t D{self.par_cur.dispositif.portee}"
+            lignes.extend(f"{p.espece}\t{p.surface_parcelle}\t{p.age}"
+                          for p in self.par_cur.plantes)
+            print("\n".join(lignes))  # Une seule écriture sur la sortie
         else:
             print("Pas de parcelle")
 
@@ -567,10 +700,15 @@ class Interface(tk.Tk):
                 on avance d'un pas, puis on crée un timer pour qu'un autre
                 pas soit exécuté jusqu'à ce que le potager se termine.
         """
-        if self.potager and (self.lecture or une_fois):
+        if self.potager and (self.lecture or une_fois) \
+                and self._calcul is None:
+            # Pas d'avance tant que dernier_pas calcule en fond
             self.n_pas += 1
             termine = not self.potager.pas() # Voir Potager
-            print(f"pas n°{self.n_pas} : {self.potager.nb_insectes}")
+            # Population relevée une seule fois pour l'affichage et
+            # l'historique
+            releve = self.potager.releve_insectes()
+            print(f"pas n°{self.n_pas} : {self.population(releve)}")
 # =============================================================================
 #           Ces conditions permettent que la première fois qu'on utilise
 #           l'avance automatique, la simulation s'arrête au pas indiqué dans
@@ -583,55 +721,151 @@ class Interface(tk.Tk):
                 if self.lecture:
                     self.toggleLecture()
                 print("terminé")
-            self._T_nb_insectes.append(self.potager.nb_insectes)
-        if une_fois or self._actu_compteur % FREQ_ACTU_MAINFRAME == 0:
-            # On ne met à jour l'affichage que tout les FREQ_ACTU_MAINFRAME pas
-            self.update_mainframe()
+            self._T_nb_insectes.append(releve)
+        self.planifier_maj()
         if self.lecture:
-            self._actu_compteur += 1
             self.after(self.delai, self.pas)  # On planifie le pas suivant
 
-    def dernier_pas(self) -> None:
-        """Avance la simulation jusqu'au pas maximum sans actualiser."""
-        if self.potager:
-            n_pas_debut = self.n_pas
-            while not self.termine:
-                # La simulation ne s'effectue pas si le potager a déjà été fini
-                self._T_nb_insectes.append(self.potager.nb_insectes)
-                self.termine = not self.potager.pas()
-                self.n_pas += 1
-            print(f"Terminé : {self.n_pas-n_pas_debut} pas effectués")
+    @staticmethod
+    def population(releve: list) -> dict:
+        """Nombre d'insectes par nom d'espèce présente dans un relevé.
+
+        releve est une liste renvoyée par Potager.releve_insectes.
+        """
+        return {nom: n for nom, n in zip(CODES_ESPECES, releve) if n}
+
+    def planifier_maj(self) -> None:
+        """Planifie la mise à jour du cadre principal.
+
+        La mise à jour est exécutée lorsque Tk n'a plus d'évènement à traiter.
+        Les demandes faites d'ici là sont regroupées en une seule mise à jour :
+        si la simulation va plus vite que l'affichage, les pas intermédiaires
+        ne sont pas dessinés.
+        """
+        if not self._maj_en_attente:
+            self._maj_en_attente = True
+            self.after_idle(self._maj_planifiee)
+
+    def _maj_planifiee(self) -> None:
+        """Exécute la mise à jour planifiée par planifier_maj."""
+        self._maj_en_attente = False
+        if self.potager and self._calcul is None:
             self.update_mainframe()
 
+    def dernier_pas(self) -> None:
+        """Avance la simulation jusqu'au pas maximum sans actualiser.
+
+        Les pas sont calculés dans un thread, pour que l'interface reste
+        réactive pendant les longues simulations. Les résultats sont relevés
+        par _relever_calcul toutes les DELAI_RELEVE millisecondes, et le cadre
+        principal n'est mis à jour qu'une fois la simulation terminée.
+        """
+        if self.potager and self._calcul is None:
+            file_pas = queue.Queue()
+            self._arret_calcul = threading.Event()
+            self._calcul = threading.Thread(
+                target=self._calculer_fin,
+                args=(self.potager, self.termine, file_pas,
+                      self._arret_calcul), daemon=True)
+            self._calcul.start()
+            self.after(DELAI_RELEVE, self._relever_calcul,
+                       self.potager, file_pas, self.n_pas)
+
+    @staticmethod
+    def _calculer_fin(potager: Potager, termine: bool,
+                      file_pas: queue.Queue, arret: threading.Event) -> None:
+        """Simule le potager jusqu'à sa fin (exécuté dans un thread).
+
+        Chaque pas dépose dans file_pas la population d'avant le pas et Vrai
+        si la simulation est terminée. None est déposé à la fin du calcul.
+        Le calcul s'interrompt dès que arret est levé.
+        """
+        while not termine and not arret.is_set():
+            # La simulation ne s'effectue pas si le potager a déjà été fini
+            population = potager.releve_insectes()
+            termine = not potager.pas()
+            file_pas.put((population, termine))
+        file_pas.put(None)
+
+    def _relever_calcul(self, potager: Potager, file_pas: queue.Queue,
+                        n_pas_debut: int) -> None:
+        """Relève les pas calculés par le thread lancé par dernier_pas."""
+        if potager is not self.potager:
+            # Un autre potager a été chargé entre-temps : le calcul en cours
+            # ne concerne plus l'interface
+            return
+        while True:
+            try:
+                releve = file_pas.get_nowait()
+            except queue.Empty:
+                break
+            if releve is None:  # Calcul terminé
+                self._calcul = None
+                self._arret_calcul = None
+                print(f"Terminé : {self.n_pas-n_pas_debut} pas effectués")
+                self.update_mainframe()
+                return
+            population, self.termine = releve
+            self._T_nb_insectes.append(population)
+            self.n_pas += 1
+        self.after(DELAI_RELEVE, self._relever_calcul,
+                   potager, file_pas, n_pas_debut)
+
+    def _arreter_calcul(self) -> None:
+        """Arrête le calcul lancé par dernier_pas, s'il y en a un.
+
+        Le thread finit le pas en cours sur l'ancien potager puis s'arrête :
+        il ne prend plus de temps à l'interface ni aux calculs suivants.
+        """
+        if self._arret_calcul is not None:
+            self._arret_calcul.set()
+        self._calcul = None
+        self._arret_calcul = None
+
+    def _calcul_en_cours(self) -> bool:
+        """Renvoie Vrai, en le signalant, si dernier_pas calcule en fond.
+
+        Le potager est alors modifié par le thread de calcul : l'interface
+        ne doit pas le lire avant la fin du calcul.
+        """
+        if self._calcul is None:
+            return False
+        print("Calcul en cours, veuillez patienter.")
+        return True
+
     def chargement_manuel(self, potager):
         """Charge un potager depuis une instance de Potager."""
         if isinstance(potager, Potager):
             # On définit le potager associé à l'interface
             self.potager = potager
+            self._arreter_calcul()
             self.set_canvas()
             self.fichier_cur = self.potager._nom_fichier
             print("Potager chargé.")
 
-    def load_frame_assets(self):
-        """Charge les fichiers de l'interface."""
-        self._img_bp_debut = tk.PhotoImage(file="assets/debut.png")
-        self._img_bp_fin = tk.PhotoImage(file="assets/fin.png")
-        self._img_bp_pause = tk.PhotoImage(file="assets/pause.png")
-        self._img_bp_play = tk.PhotoImage(file="assets/play.png")
-        self._img_bp_precedent = tk.PhotoImage(file="assets/precedent.png")
-        self._img_bp_stop = tk.PhotoImage(file="assets/stop.png")
-        self._img_bp_suivant = tk.PhotoImage(file="assets/suivant.png")
-
-    def load_assets(self):
-        """Charge les sprites pour le canvas principal."""
-        self._img_parcelle_h = tk.PhotoImage(file="assets/parcelle_humide.png")
-        self._img_parcelle_s = tk.PhotoImage(file="assets/parcelle_seche.png")
-        self._img_defaut = tk.PhotoImage(file="assets/defaut.png")
-        self._img_cursor = tk.PhotoImage(file="assets/cursor.png")
-        self._img_sprk_1 = tk.PhotoImage(file="assets/sprinkler_1.png")
-        self._img_sprk_2 = tk.PhotoImage(file="assets/sprinkler_2.png")
-        self._img_sprk_3 = tk.PhotoImage(file="assets/sprinkler_3.png")
-        self._imgs_sprk = [self._img_sprk_1, self._img_sprk_2, self._img_sprk_3]
+    # Sprites de l'interface et du canvas principal : chaque fichier n'est
+    # décodé qu'à la première utilisation du sprite, puis conservé pour
+    # les potagers chargés ensuite.
+    _img_bp_debut = _sprite("assets/debut.png")
+    _img_bp_fin = _sprite("assets/fin.png")
+    _img_bp_pause = _sprite("assets/pause.png")
+    _img_bp_play = _sprite("assets/play.png")
+    _img_bp_precedent = _sprite("assets/precedent.png")
+    _img_bp_stop = _sprite("assets/stop.png")
+    _img_bp_suivant = _sprite("assets/suivant.png")
+
+    _img_parcelle_h = _sprite("assets/parcelle_humide.png")
+    _img_parcelle_s = _sprite("assets/parcelle_seche.png")
+    _img_defaut = _sprite("assets/defaut.png")
+    _img_cursor = _sprite("assets/cursor.png")
+    _img_sprk_1 = _sprite("assets/sprinkler_1.png")
+    _img_sprk_2 = _sprite("assets/sprinkler_2.png")
+    _img_sprk_3 = _sprite("assets/sprinkler_3.png")
+
+    @property
+    def _imgs_sprk(self) -> list:
+        """Sprites des dispositifs selon leur portée affichée."""
+        return [self._img_sprk_1, self._img_sprk_2, self._img_sprk_3]
 
 
 if __name__ == "__main__":
@@ -4,10 +4,28 @@
 
 Contient la classe Plante et sa classe héritée Drageon.
 """
-from random import random, choice
+from random import random, randrange
 import logging
 from entite_parcelle import EntiteParcelle
 
+
+# Développements d'une plante selon l'état de sa parcelle, indexés par
+# 2*p_engrais + p_insecte : (humidité incorrecte, humidité correcte)
+_DEVELOPPEMENTS = tuple(tuple(max(0, (1 + e) * (1 + h - i)) for h in (0, 1))
+                        for e in (0, 1) for i in (0, 1))
+
+
+def developpements(p_engrais: bool, p_insecte: bool) -> (int, int):
+    """Renvoie les développements d'une plante sur une parcelle.
+
+    Le premier élément est le développement d'une plante dont l'humidité
+    n'est pas correcte, le second celui d'une plante dont l'humidité est
+    correcte. Ils ne dépendent que de l'état de la parcelle et sont lus
+    dans une table une fois par parcelle pour toutes ses plantes.
+    """
+    return _DEVELOPPEMENTS[2*p_engrais + p_insecte]
+
+
 class Plante(EntiteParcelle):
     """Plante d'une parcelle.
 
@@ -23,8 +41,10 @@ class Plante(EntiteParcelle):
         _tps_entre_recoltes : int >= 0
             Nombre de pas entre deux récoltes pour une plante mature.
 
-        _humidite : (0 <= int <= 1, 0 <= int <= 1)
-            Humidités minimum et maximum pour le développement de la plante.
+        _hum_min : 0 <= float <= 1
+            Humidité minimum pour le développement de la plante.
+        _hum_max : 0 <= float <= 1
+            Humidité maximum pour le développement de la plante.
         surface_parcelle : 0.2 <= float <= 1
             Fraction de la parcelle que prend la plante.
 
@@ -37,16 +57,30 @@ class Plante(EntiteParcelle):
         _tps_croissance : int = 0
             Nombre de pas pendant lequel le fruit s'est développé. Le fruit
             est récolté lorsque ce développement atteint tps_entre_recoltes.
+        _mature : bool
+            Vrai si la plante est mature. L'âge ne faisant qu'augmenter, il
+            est levé une fois pour toutes par developper.
 
 
     Methods
     -------
-        update_developpement(self) -> float
+        update_developpement(self) -> int
             Gère le développement de la plante.
+        developper(self, humidite, devs) -> int
+            Gère le développement de la plante selon l'état de sa parcelle.
         update_fruits(self) -> bool
             Récolte les fruits si il y en a et les ajoute à la récolte.
+        cloner(self) -> Plante
+            Renvoie une jeune plante de la même espèce, sans validation.
     """
 
+    # Les plantes se multiplient par drageonnement : pas de __dict__, on ne
+    # peut donc pas leur ajouter d'attribut en dehors de ceux-ci.
+    __slots__ = ("_espece", "_tps_maturation", "_nb_recoltes_potentielles",
+                 "_tps_entre_recoltes", "_hum_min", "_hum_max",
+                 "_surface_parcelle", "_tps_sous_insecticide",
+                 "_tps_croissance", "_nb_recoltes_effectuees", "_mature")
+
     def __init__(self,
                  espece: str,
                  tps_maturation: int,
@@ -80,58 +114,74 @@ class Plante(EntiteParcelle):
         super().__init__()
 
         # Définition de l'espèce
-        try:
-            self._espece = str(espece)
-        except ValueError as exc:
-            raise TypeError("espece doit être un str") from exc
+        if type(espece) is str:  # Déjà du bon type
+            self._espece = espece
+        else:
+            try:
+                self._espece = str(espece)
+            except (ValueError, TypeError) as exc:
+                raise TypeError("espece doit être un str") from exc
 
         # Définition du temps de maturation
-        try:
-            self._tps_maturation = int(tps_maturation)
-        except ValueError as exc:
-            raise TypeError("tps_maturation doit être un entier.") \
-                from exc
+        if type(tps_maturation) is int:  # Déjà du bon type
+            self._tps_maturation = tps_maturation
+        else:
+            try:
+                self._tps_maturation = int(tps_maturation)
+            except (ValueError, TypeError) as exc:
+                raise TypeError("tps_maturation doit être un entier.") \
+                    from exc
         if self._tps_maturation < 0:
             raise ValueError("tps_maturation doit être supérieur"
                              + " ou égal à 0.")
 
         # Définition du nombre de récoltes potentielles
-        try:
-            self._nb_recoltes_potentielles = int(nb_recoltes_potentielles)
-        except ValueError as exc:
-            raise TypeError("nb_recoltes_potentielles doit être un entier.") \
-                from exc
+        if type(nb_recoltes_potentielles) is int:  # Déjà du bon type
+            self._nb_recoltes_potentielles = nb_recoltes_potentielles
+        else:
+            try:
+                self._nb_recoltes_potentielles = int(nb_recoltes_potentielles)
+            except (ValueError, TypeError) as exc:
+                raise TypeError("nb_recoltes_potentielles doit être"
+                                + " un entier.") from exc
         if self._nb_recoltes_potentielles < 0:
             raise ValueError("nb_recoltes_potentielles doit être supérieur"
                              + " ou égal à 0.")
 
         # Définition du temps entre 2 récoltes
-        try:
-            self._tps_entre_recoltes = int(tps_entre_recoltes)
-        except ValueError as exc:
-            raise TypeError("tps_entre_recoltes doit être un entier.") \
-                from exc
+        if type(tps_entre_recoltes) is int:  # Déjà du bon type
+            self._tps_entre_recoltes = tps_entre_recoltes
+        else:
+            try:
+                self._tps_entre_recoltes = int(tps_entre_recoltes)
+            except (ValueError, TypeError) as exc:
+                raise TypeError("tps_entre_recoltes doit être un entier.") \
+                    from exc
         if self._tps_entre_recoltes < 0:
             raise ValueError("tps_entre_recoltes doit être supérieur"
                              + " ou égal à 0.")
 
         # Définition de l'humidité
         try:
-            self._humidite = (float(humidite[0]), float(humidite[1]))
+            self._hum_min = float(humidite[0])
+            self._hum_max = float(humidite[1])
         except (ValueError, IndexError, TypeError) as exc:
             raise ValueError("humidite est un trouple de 2"
                              + " flottants entre 0 et 1.") from exc
-        if self._humidite[0] > 1 or self._humidite[0] < 0:
+        if self._hum_min > 1 or self._hum_min < 0:
             raise ValueError("humidite[0] doit être compris entre 0 et 1.")
-        if self._humidite[1] > 1 or self._humidite[1] < 0:
+        if self._hum_max > 1 or self._hum_max < 0:
             raise ValueError("humidite[1] doit être compris entre 0 et 1.")
 
         # Définition de la surface au sol
-        try:
-            self._surface_parcelle = float(surface_parcelle)
-        except ValueError as exc:
-            raise TypeError("surface_parcelle doit être un flottant"
-                            + " entre 0.2 et 1.") from exc
+        if type(surface_parcelle) is float:  # Déjà du bon type
+            self._surface_parcelle = surface_parcelle
+        else:
+            try:
+                self._surface_parcelle = float(surface_parcelle)
+            except (ValueError, TypeError) as exc:
+                raise TypeError("surface_parcelle doit être un flottant"
+                                + " entre 0.2 et 1.") from exc
         if self._surface_parcelle < 0.2 or self._surface_parcelle > 1:
             raise ValueError("surface_parcelle doit être"
                              + "compris entre 0.2 et 1.")
@@ -139,6 +189,7 @@ class Plante(EntiteParcelle):
         self._tps_sous_insecticide = 0
         self._tps_croissance = 0
         self._nb_recoltes_effectuees = 0
+        self._mature = self._age >= self._tps_maturation
 
     # Getters des attributs
 
@@ -151,7 +202,35 @@ class Plante(EntiteParcelle):
     def surface_parcelle(self) -> str:
         """Attribute surface_parcelle getter."""
         return self._surface_parcelle
-    def update_developpement(self) -> float:
+
+    @property
+    def humidite(self) -> (float, float):
+        """Humidités minimum et maximum pour le développement de la plante."""
+        return (self._hum_min, self._hum_max)
+
+    def cloner(self):
+        """Renvoie une jeune plante de la même espèce que la plante.
+
+        Les caractéristiques de la plante ont été validées par son
+        constructeur : elles sont recopiées sans repasser par les
+        conversions et vérifications de __init__.
+        """
+        clone = object.__new__(type(self))
+        EntiteParcelle.__init__(clone)
+        clone._espece = self._espece
+        clone._tps_maturation = self._tps_maturation
+        clone._nb_recoltes_potentielles = self._nb_recoltes_potentielles
+        clone._tps_entre_recoltes = self._tps_entre_recoltes
+        clone._hum_min = self._hum_min
+        clone._hum_max = self._hum_max
+        clone._surface_parcelle = self._surface_parcelle
+        clone._tps_sous_insecticide = 0
+        clone._tps_croissance = 0
+        clone._nb_recoltes_effectuees = 0
+        clone._mature = clone._age >= clone._tps_maturation
+        return clone
+
+    def update_developpement(self) -> int:
         """Effectue un pas de développement de la plante.
 
         Calcule la valeur de développement à partir des attributs de la
@@ -159,24 +238,34 @@ class Plante(EntiteParcelle):
         parcelle valide, sinon la fonction renvoie UnboundLocalError.
         """
         try:
-            # Présence d'un insecte
-            p_insecte = (len(self._parcelle.insectes) != 0)
-            # Humidité correcte
-            hum_ok = (self._parcelle.humidite >= self._humidite[0]
-                      and self._parcelle.humidite <= self._humidite[1])
-            # Présence d'engrais
-            p_engrais = (self._parcelle.engrais > 0)
-            dev = max(0, (1 + 1*p_engrais) * (1 + 1*hum_ok - 1*p_insecte))
-            self._age += dev
-            if self.mature:
-                self._tps_croissance += dev
-            if self.potager.loglevel >=3:
-                print(f'{self.parcelle} {self.espece} : {dev}')
-            return dev
+            parcelle = self._parcelle
+            devs = developpements(parcelle._engrais > 0,
+                                  len(parcelle._insectes) != 0)
+            return self.developper(parcelle._humidite, devs)
         except AttributeError as exc:
             raise UnboundLocalError("La parcelle doit être définie pour"
                                     + " la plante.") from exc
 
+    def developper(self, humidite: float, devs: (int, int)) -> int:
+        """Effectue un pas de développement selon l'état de la parcelle.
+
+        L'humidité de la parcelle et ses développements possibles, donnés
+        par developpements, sont relevés une fois par Parcelle.update_plantes
+        pour toutes ses plantes. Renvoie la valeur de développement.
+        """
+        # Le développement est choisi selon que l'humidité est correcte
+        dev = devs[humidite >= self._hum_min and humidite <= self._hum_max]
+        age = self._age + dev
+        self._age = age
+        mature = self._mature
+        if not mature and age >= self._tps_maturation:
+            self._mature = mature = True
+        if mature:
+            self._tps_croissance += dev
+        if self._loglevel >= 3:
+            print(f'{self._parcelle} {self._espece} : {dev}')
+        return dev
+
     @property
     def mature(self) -> bool:
         """Renvoie Vrai si la plante est mature, Faux sinon.
@@ -184,7 +273,7 @@ class Plante(EntiteParcelle):
         La plante est mature si son âge est supérieure ou égale à
         son temps de maturation.
         """
-        return self.age >= self._tps_maturation
+        return self._mature
 
     @property
     def productive(self) -> bool:
@@ -194,7 +283,7 @@ class Plante(EntiteParcelle):
         SI son nombre de récoltes faites n'a pas atteint le nombre de
         récoltes maximum de la plante.
         """
-        return (self.mature
+        return (self._mature
                 and (self._nb_recoltes_effectuees
                      < self._nb_recoltes_potentielles))
 
@@ -204,18 +293,25 @@ class Plante(EntiteParcelle):
         Executé à chaque pas de simulation. Augmente le développement des
         fruits si l'arbre est productif et les récolte si ils sont mûrs.
         Si un fruit est récolté, incrémente self._nb_recoltes_effectuees.
-        Renvoie Vrai si un fruit a été récolté ce pas-ci.
+        Une plante qui a donné toutes ses récoltes meurt et est retirée de
+        sa parcelle. Renvoie Vrai si un fruit a été récolté ce pas-ci.
         """
-        # Condition de maturité, de productivité et de fruit mûr
-        if ((self.mature and self.productive) and
-                self._tps_croissance >= self._tps_entre_recoltes):
+        nb_recoltes = self._nb_recoltes_effectuees
+        # Condition de productivité (qui implique la maturité) et de fruit mûr
+        if (self._mature
+                and nb_recoltes < self._nb_recoltes_potentielles
+                and self._tps_croissance >= self._tps_entre_recoltes):
             # On récolte
-            if self.potager.loglevel >= 2:
-                print(f'{self.parcelle} {self.espece} ♣ {self._tps_sous_insecticide}')
+            parcelle = self._parcelle
+            tps_sous_insecticide = self._tps_sous_insecticide
+            if self._loglevel >= 2:
+                print(f'{parcelle} {self._espece} ♣ {tps_sous_insecticide}')
             self._tps_croissance = 0  # On réinitialise la croissance du fruit
-            self._nb_recoltes_effectuees += 1
-            fruit = (self._espece, self._tps_sous_insecticide)
-            self.parcelle.potager.ajouter_recolte(fruit)
+            self._nb_recoltes_effectuees = nb_recoltes + 1
+            parcelle._potager.recolter(self._espece, tps_sous_insecticide)
+            if nb_recoltes + 1 >= self._nb_recoltes_potentielles:
+                # La plante ne produira plus : elle meurt
+                parcelle.retirer(self)
             return True
         return False
     def pas(self) -> None:
@@ -240,10 +336,12 @@ class Drageon(Plante):
 
     Methods
     -------
-        coloniser(self) -> bool
+        coloniser(self, voisines) -> bool
             Gère le développement de la plante.
     """
 
+    __slots__ = ("_proba_colonisation",)
+
     def __init__(self,
                  espece: str,
                  tps_maturation: int,
@@ -290,45 +388,47 @@ class Drageon(Plante):
             raise ValueError("proba_colonisation doit être"
                              + "compris entre 0 et 1.")
 
-    def coloniser(self) -> bool:
+    def cloner(self):
+        """Renvoie un jeune drageon de la même espèce que la plante."""
+        clone = super().cloner()
+        clone._proba_colonisation = self._proba_colonisation
+        return clone
+
+    def coloniser(self, voisines: list = None) -> bool:
         """Gère le développement de la plante par drageonnement.
 
+        voisines est la liste des parcelles voisines de la parcelle de la
+        plante. Parcelle.update_plantes la relève une fois pour tous ses
+        drageons ; si elle n'est pas donnée, elle est demandée à la parcelle.
         Renvoie Vrai si la plante a drageonné.
         """
-        if not self.mature:  # La plante doit être adulte pour drageonner
+        if not self._mature:  # La plante doit être adulte pour drageonner
             return False
         # La plante peut drageonner avec une certaine probabilité
         if random() > self._proba_colonisation:
             return False
-        try:
-            parcelles_voisines = self.parcelle.voisines()
-        except AttributeError as exc:
-            raise UnboundLocalError("La parcelle doit être définie pour"
-                                    + " la plante.") from exc
-        parcelles_colonisables = []
-        # On cherche une parcelle colonisable
-        for parcelle in parcelles_voisines:
-            surface_occupee = 0
-            for plante in parcelle._plantes:
-                # On compte la surface totale prise par les plantes
-                # de la parcelle
-                surface_occupee += plante._surface_parcelle
+        if voisines is None:
+            try:
+                voisines = self.parcelle.voisines()
+            except AttributeError as exc:
+                raise UnboundLocalError("La parcelle doit être définie pour"
+                                        + " la plante.") from exc
+        # On choisit une parcelle colonisable en un seul parcours, par
+        # échantillonnage par réservoir : la n-ième parcelle colonisable
+        # remplace la parcelle retenue avec une probabilité 1/n
+        colonie = None
+        n_colonisables = 0
+        for parcelle in voisines:
             # Il faut assez d'espace sur la parcelle à coloniser pour
             # que le drageon s'y rajoute
-            if 1 - surface_occupee > self._surface_parcelle:
-                parcelles_colonisables.append(parcelle)
-        if not parcelles_colonisables:
+            if 1 - parcelle._surface_occupee > self._surface_parcelle:
+                n_colonisables += 1
+                if randrange(n_colonisables) == 0:
+                    colonie = parcelle
+        if colonie is None:
             return False
-        # Toutes les conditions requises sont réunies : On choisit une parcelle
-        colonie = choice(parcelles_colonisables)
         # On plante le drageon
-        colonie.planter(Drageon(self._espece,
-                                self._tps_maturation,
-                                self._nb_recoltes_potentielles,
-                                self._tps_entre_recoltes,
-                                self._humidite,
-                                self._surface_parcelle,
-                                self._proba_colonisation))
-        if self.potager.loglevel >=1:
+        colonie.planter(self.cloner())
+        if self._loglevel >= 1:
             print(f"{self.parcelle} {self.espece} → {colonie}")
         return True
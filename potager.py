@@ -5,12 +5,16 @@
 Permet de simuler le potager et contient la classe Potager et Parcelle.
 """
 
-from plante import Plante, Drageon
-from insecte import Insecte
-from dispositif import Dispositif,Programme
-
-from random import choice
-from collections import Counter
+from entite_parcelle import EntiteParcelle
+from plante import Plante, Drageon, developpements
+from insecte import Insecte, CODES_ESPECES
+from dispositif import (Dispositif, Programme,
+                        BIT_EAU, BIT_ENGRAIS, BIT_INSECTICIDE)
+
+from random import choice, randrange
+from collections import Counter, namedtuple
+from itertools import chain
+from array import array
 import os
 import xml.etree.ElementTree as ET
 import logging as log
@@ -18,6 +22,11 @@ import logging as log
 HUMIDITE_INIT = 0.5  # Humidité par défaut d'une parcelle
 LOG_LEVEL = 1
 
+# Instantané de l'état du potager : une liste par champ, dont les éléments
+# suivent l'ordre de Potager._parcelles_1d
+SnapshotPotager = namedtuple("SnapshotPotager",
+                             ["surfaces", "humidites", "nb_insectes"])
+
 class Potager():
     """Contient une liste de parcelles et en avance le pas de simulation.
 
@@ -42,26 +51,50 @@ class Potager():
         de facto leur emplacement dans le potager.
     _parcelles_1d : list[Parcelle]
         Liste de toutes les parcelles : Version aplatie de _parcelles.
+    _parcelles_plates : list[Parcelle|None]
+        Cases de _parcelles rangée par rangée, y compris les cases vides :
+        la case (x, y) est à l'indice x*largeur + y.
+    _phases : tuple[list[method]]
+        Méthodes de mise à jour liées de chaque parcelle de _parcelles_1d,
+        une liste par phase d'un pas. La phase des dispositifs est faite
+        pour tout le potager par disperser.
+    _cache_voisines : dict[(Parcelle, int), tuple[Parcelle]]
+        Voisines déjà cherchées de chaque parcelle, par portée. Vidé lorsque
+        la matrice de parcelles est remplacée.
+    _cache_anneaux : dict[Parcelle, list[list[int]]]
+        Anneaux du parcours en largeur depuis chaque parcelle : l'anneau k
+        contient les indices dans _parcelles_plates des parcelles à une
+        distance k. Prolongé à la demande, vidé avec _cache_voisines.
 
     recolte : list(tuple)
         Liste des fruits récoltés, avec les tuples contenant les informations
-        des fruits
+        des fruits. Construite à la demande depuis _recolte_especes et
+        _recolte_insecticide.
+    _recolte_especes : list[str]
+        Espèce de chaque fruit récolté.
+    _recolte_insecticide : array[int]
+        Temps sous insecticide de chaque fruit récolté, dans le même ordre
+        que _recolte_especes.
 
     Methods
     -------
     pas(self) -> Bool
         Avance la simulation du potager d'un pas.
+    disperser(self) -> None
+        Simule l'activation des dispositifs de toutes les parcelles.
     snapshot(self) -> SnapshotPotager
         Renvoie un instantané de l'état du potager pour l'utilisation
         par une interface et le stockage.
-    affecter(self, x: int > 0, y: int > 0, portee: int > 0,
-             eau = False, engrais = False, insecticide = False)
-             -> list[Parcelle]
-        Cherche la liste des parcelles affectées par un dispositif situé à
-        des coordonnées (x,y) à une certaine portée et y simule la dispersion
-        d'engrais, insecticide ou eau.
+    affecter(self, portee: int > 0, parcelle: Parcelle = None,
+             produits: int = 0, pos_x: int = -1, pos_y: int = -1) -> None
+        Cherche la liste des parcelles affectées par un dispositif situé sur
+        la parcelle ou aux coordonnées (pos_x, pos_y) à une certaine portée
+        et y simule la dispersion des produits du masque (BIT_EAU,
+        BIT_ENGRAIS, BIT_INSECTICIDE).
     ajouter_recolte(self, entree) -> None
         Ajoute un fruit à la récolte.
+    recolter(self, espece: str, tps_sous_insecticide: int) -> None
+        Ajoute un fruit déjà validé à la récolte.
     _creer_parcelles_vides(self, x: int, y: int, humidite: float)
         Crée une matrice de taille (x,y) de parcelles vides.
     """
@@ -114,9 +147,10 @@ class Potager():
             # Si on charge un fichier
             try:
                 self._nom_fichier = nom_fichier
-                with open(nom_fichier) as fichier:
-                    # Chargement du contenu du fichier
-                    arbre = ET.parse(nom_fichier)
+                with open(nom_fichier, "rb") as fichier:
+                    # Chargement du contenu du fichier déjà ouvert, en
+                    # binaire pour respecter l'encodage déclaré par le XML
+                    arbre = ET.parse(fichier)
                 troncXML = arbre.getroot()
                 # Récupération des principaux paramètres du potager
                 self._nom_potager = troncXML.attrib["Nom"]
@@ -188,15 +222,15 @@ class Potager():
                     for d in parcelleXML.findall("Dispositif")[:1]:
                         dispo = Dispositif(d.attrib["Rayon"])
                         parcelle.dispositif = dispo
-                        print(f"Dispositif - {parcelle}")
+                        log.debug("Dispositif - %s", parcelle)
                         # Ajout des programmes
                         for prog in d.findall("Programme"):
-                            dispo.ajout_prog(Programme(prog.attrib["Produit"]
-                                                       .lower(),
-                                                       prog.attrib["Debut"],
-                                                       prog.attrib["Duree"],
-                                                       prog.attrib["Periode"]))
-                            print(f"Programme - {parcelle}")
+                            dispo.ajouter_programme(Programme(
+                                prog.attrib["Produit"].lower(),
+                                prog.attrib["Debut"],
+                                prog.attrib["Duree"],
+                                prog.attrib["Periode"]))
+                            log.debug("Programme - %s", parcelle)
                     # Ajout des plantes non-drageonnantes
                     for p in parcelleXML.findall("Plante"):
                         parcelle.planter(Plante(p.attrib["Espece"],
@@ -206,7 +240,7 @@ class Potager():
                                      (p.attrib["Humidite_min"],
                                       p.attrib["Humidite_max"]),
                                      p.attrib["Surface"]))
-                        print(f"Plante - {parcelle}")
+                        log.debug("Plante - %s", parcelle)
                     # Ajout des plantes drageonnantes
                     for p in parcelleXML.findall("Plante_Drageonnante"):
                         try:
@@ -218,9 +252,11 @@ class Potager():
                                       p.attrib["Humidite_max"]),
                                      p.attrib["Surface"],
                                      p.attrib["Proba_Colonisation"]))
-                            print(f"Drageon - {parcelle}")
-                        except:
-                            raise ValueError
+                            log.debug("Drageon - %s", parcelle)
+                        except (KeyError, ValueError, TypeError) as exc:
+                            raise ValueError(
+                                "Plante drageonnante invalide sur la "
+                                + f"parcelle {parcelle}.") from exc
                     # Ajout des insectes
                     for i in parcelleXML.findall("Insecte"):
                         parcelle.accueillir(Insecte(i.attrib["Espece"],
@@ -231,16 +267,33 @@ class Potager():
                                                     i.attrib["Resistance_insecticide"],
                                                     i.attrib["Temps_entre_repro"],
                                                     i.attrib["Max_portee"]))
-                        print(f"Insecte - {parcelle}")
+                        log.debug("Insecte - %s", parcelle)
 
         except (ValueError, AttributeError, KeyError) as exc:
             raise exc
 
         # version 1D pour la mise à jour séquentielle
-        self._parcelles_1d = [i for j in self._parcelles for i in j if
-                              i is not None]
+        self._parcelles_plates = list(chain.from_iterable(self._parcelles))
+        self._parcelles_1d = [i for i in self._parcelles_plates
+                              if i is not None]
+        # Méthodes de mise à jour de chaque parcelle, liées une fois pour
+        # toutes et rangées dans l'ordre des phases d'un pas
+        self._phases = ([i.update_plantes for i in self._parcelles_1d],
+                        [i.update_insectes for i in self._parcelles_1d],
+                        [self.disperser],
+                        [i.update_parcelle for i in self._parcelles_1d])
+        # Les voisines directes (insectes, drageons) et celles à portée des
+        # dispositifs servent à chaque pas : elles sont cherchées dès le
+        # chargement
+        self._cache_voisines = {}
+        self._cache_anneaux = {}
+        for parcelle in self._parcelles_1d:
+            self._voisines_cachees(parcelle)
+            if parcelle.dispositif is not None:
+                self._voisines_cachees(parcelle, parcelle.dispositif.portee)
         self.loglevel = LOG_LEVEL
-        self._recolte = []
+        self._recolte_especes = []
+        self._recolte_insecticide = array("l")
 
     @property
     def parcelles(self) -> list:
@@ -279,6 +332,12 @@ class Potager():
                         "Chaque élément de parcelles doit être "
                         + "instance de Parcelle ou hérité.")
         self._parcelles = parcelles
+        self._parcelles_plates = list(chain.from_iterable(parcelles))
+        self._cache_voisines = {}
+        self._cache_anneaux = {}
+        for parcelle in self._parcelles_plates:
+            if parcelle is not None:
+                parcelle._voisines_1 = None
 
     def _creer_parcelles_vides(self, l_x: int, l_y: int,
                                humidite: float = HUMIDITE_INIT) -> list: 
@@ -297,7 +356,7 @@ class Potager():
     @property
     def recolte(self) -> list:
         """Attribute recolte getter."""
-        return self._recolte
+        return list(zip(self._recolte_especes, self._recolte_insecticide))
 
     def ajouter_recolte(self, entree) -> None:
         """Ajoute un fruit à la récolte.
@@ -307,32 +366,61 @@ class Potager():
             *un entier pour le temps sous insecticide.
         """
         try:
-            self._recolte.append((str(entree[0]), int(entree[1])))
+            espece, tps_sous_insecticide = str(entree[0]), int(entree[1])
         except (ValueError, TypeError, IndexError) as exc:
             raise TypeError("Les informations du fruit récolté n'ont pas le"
                             + "format demandé.") from exc
+        self.recolter(espece, tps_sous_insecticide)
+
+    def recolter(self, espece: str, tps_sous_insecticide: int) -> None:
+        """Ajoute un fruit à la récolte sans valider ses informations.
+
+        Utilisé par les plantes, dont l'espèce et le temps sous insecticide
+        sont déjà du bon type : aucun tuple n'est construit par fruit.
+        """
+        self._recolte_especes.append(espece)
+        self._recolte_insecticide.append(tps_sous_insecticide)
 
     def recolte_par_especes(self) -> dict:
-        recolte_especes = dict()
-        for i in self.recolte:
-            if i[0] not in recolte_especes.keys():
-                recolte_especes[i[0]] = 0
-            recolte_especes[i[0]] += 1
-        return recolte_especes
+        """Renvoie le nombre de fruits récoltés de chaque espèce."""
+        return dict(Counter(self._recolte_especes))
 
     @property
     def nb_insectes(self) -> dict:
         """Obtenir le nombre d'insectes sur le potager de chaque espèce."""
-        l_insectes = Counter()
-        for i in self._parcelles_1d:
-            l_insectes += i.nb_insectes
-        return l_insectes
+        return Counter(insecte.espece for par in self._parcelles_1d
+                       for insecte in par._insectes)
+
+    def releve_insectes(self) -> list:
+        """Renvoie le nombre d'insectes du potager de chaque espèce.
+
+        Le nombre d'insectes de l'espèce de code c (voir
+        insecte.CODES_ESPECES) est à l'indice c de la liste. Contrairement à
+        nb_insectes, aucun dictionnaire n'est construit par parcelle.
+        """
+        releve = [0] * len(CODES_ESPECES)
+        for par in self._parcelles_1d:
+            for insecte in par._insectes:
+                releve[insecte._code_espece] += 1
+        return releve
 
     @property
     def nom_potager(self) -> str:
         """Attribute nom_potager getter."""
         return self._nom_potager
 
+    def snapshot(self) -> SnapshotPotager:
+        """Renvoie un instantané de l'état du potager.
+
+        L'instantané contient, pour chaque parcelle de _parcelles_1d, la
+        surface occupée par les plantes, l'humidité et le nombre total
+        d'insectes, rangés par champ plutôt que par parcelle.
+        """
+        parcelles = self._parcelles_1d
+        return SnapshotPotager([par.surface_totale for par in parcelles],
+                               [par._humidite for par in parcelles],
+                               [len(par._insectes) for par in parcelles])
+
     def pas(self) -> bool:
         """Avance la simulation du potager d'un pas.
 
@@ -340,34 +428,35 @@ class Potager():
          donc si le pas maximum est atteint, et True sinon.
         """
         # log.info(f"Pas n°{self._pas}")
+        EntiteParcelle._loglevel = self.loglevel
         # On exécute pour chaque parcelle dans les fonctions dans l'ordre
-        for fonc in (Parcelle.update_plantes, Parcelle.update_insectes,
-                         Parcelle.update_dispositif, Parcelle.update_parcelle):
-            for i in self._parcelles_1d:
-                fonc(i)
+        for phase in self._phases:
+            for update in phase:
+                update()
         self._pas += 1
+        # False si la simulation doit s'arrêter
         return self._pas < self._nb_iter
-        for i in self._parcelles_1d:
-            i.update_plantes()
-        for i in self._parcelles_1d:
-            i.update_insectes()
-        for i in self._parcelles_1d:
-            i.update_dispositif()
-        for i in self._parcelles_1d:
-            i.update_parcelle()
-        self._pas += 1
-        return self._pas < self._nb_iter
-        # False si la simulation doit continuer
 
-    def affecter(self, portee: int, parcelle = None,
-                 eau=False, engrais=False, insecticide=False,
-                 pos_x: int = -1, pos_y: int = -1) -> list:
+    def disperser(self) -> None:
+        """Simule l'activation des dispositifs de toutes les parcelles.
+
+        Les parcelles sans dispositif, les plus nombreuses, sont écartées en
+        une passe sans appeler leur méthode update_dispositif.
+        """
+        for par in self._parcelles_1d:
+            if par._dispositif is not None:
+                par.update_dispositif()
+
+    def affecter(self, portee: int, parcelle = None, produits: int = 0,
+                 pos_x: int = -1, pos_y: int = -1) -> None:
         """Affecte les parcelles à portée d'une position par les intrants.
 
         Cherche la liste des parcelles affectées par un dispositif situé sur la
         parcelle spécifiée ou si non indiquée, à la parcelle située
         aux coordonnées (pos_x, pos_ y) à une certaine portée et y simule
         la dispersion d'engrais, insecticide et/ou eau.
+        produits est le masque des produits dispersés, fait des bits
+        BIT_EAU, BIT_ENGRAIS et BIT_INSECTICIDE.
         """
         if parcelle is None:
             try:
@@ -376,17 +465,21 @@ class Potager():
                 raise(ValueError, "La position spécifiée est invalide.")
                 voisines = []
             else:
-                voisines = parcelle.voisines(portee)
+                voisines = self._voisines_cachees(parcelle, portee)
         else:
-            voisines = parcelle.voisines(portee)
-        if voisines:
-            #print(voisines)
-            pass
-        for voisine in voisines:
-            # On modifie chaque parcelle en fonction des produits diffusés
-            if eau: voisine.arroser()
-            if engrais: voisine.mettre_engrais()
-            if insecticide: voisine.mettre_insecticide()
+            voisines = self._voisines_cachees(parcelle, portee)
+        # On modifie chaque parcelle en fonction des produits diffusés. Les
+        # produits sont les mêmes pour toutes les parcelles : on les teste
+        # une fois, avant de parcourir les voisines
+        if produits & BIT_EAU:
+            for voisine in voisines:
+                voisine.arroser()
+        if produits & BIT_ENGRAIS:
+            for voisine in voisines:
+                voisine.mettre_engrais()
+        if produits & BIT_INSECTICIDE:
+            for voisine in voisines:
+                voisine.mettre_insecticide()
 
     def voisines(self, parcelle, portee: int = 1) -> list:
         """Renvoie la liste des parcelles voisine de la parcelle.
@@ -395,57 +488,101 @@ class Potager():
         Manhattan à parcourir au plus pour chercher les voisins.
         Renvoie [] si la parcelle n'a pas de voisines.
         """
+        return list(self._voisines_cachees(parcelle, portee))
+
+    def _voisines_cachees(self, parcelle, portee: int = 1) -> tuple:
+        """Renvoie le tuple des parcelles voisines de la parcelle.
+
+        La topologie du potager ne change pas pendant la simulation : les
+        voisines ne sont cherchées qu'une fois par parcelle et par portée,
+        puis lues dans _cache_voisines, ou dans l'attribut _voisines_1 de la
+        parcelle pour une portée de 1.
+        """
+        if portee == 1:
+            # Portée des insectes et des drageons : pas de clé à construire
+            voisines = parcelle._voisines_1
+            if voisines is None:
+                voisines = self._voisines_directes(parcelle)
+                parcelle._voisines_1 = voisines
+            return voisines
+        voisines = self._cache_voisines.get((parcelle, portee))
+        if voisines is not None:
+            return voisines
         if portee <= 0:
             raise ValueError("La portée doit être un entier positif non nul.")
-        lvoisines = self._voisines(parcelle, portee)
-        log.debug(f"Portee = {portee}   L = {len(lvoisines)}")
-        if portee > 1:
-            # Pour une portée > 1, l'algorithme considère la parcelle comme
-            # l'une de ses voisines, on la supprime donc de la liste
-            try:
-                lvoisines.remove(parcelle)
-            except ValueError:
-                # Cas qui peut arriver lorsque la parcelle n'a pas de voisines
-                pass
-        log.debug(f"{parcelle} {lvoisines}")
-        return lvoisines
-
-    def _voisines(self, parcelle, portee) -> list :
-        voisines = []
-        if not portee:
-            return parcelle
+        plates = self._parcelles_plates
+        voisines = tuple(plates[case]
+                         for anneau in self._anneaux(parcelle, portee)[1:]
+                         for case in anneau)
+        log.debug("%s portee = %s   L = %s", parcelle, portee, len(voisines))
+        self._cache_voisines[parcelle, portee] = voisines
+        return voisines
+
+    def _voisines_directes(self, parcelle) -> tuple:
+        """Renvoie les voisines à une distance de 1 de la parcelle.
+
+        Les quatre cases autour de la parcelle sont lues directement dans
+        _parcelles_plates, sans parcours en largeur.
+        """
+        longueur = len(self._parcelles)
+        largeur = len(self._parcelles[0])
+        plates = self._parcelles_plates
         x, y = parcelle.pos_x, parcelle.pos_y
-        # On ne rajoute la parcelle (vide ou non) que si l'on n'est pas au bord
-        if x+1 < self._longueur:
-            par = self.parcelles[x+1][y]
-            if par is not None:
-                voisines.append(par)
-        if x != 0:
-            par = self.parcelles[x-1][y]
-            if par is not None:
-                voisines.append(par)
-        if y+1 < self._largeur:
-            par = self.parcelles[x][y+1]
-            if par is not None:
-                voisines.append(par)
-        if y != 0:
-            par = self.parcelles[x][y-1]
-            if par is not None:
-                voisines.append(par)
-        if portee == 1:
-            return voisines
-        else:
-            return list(set(voisines+[i for j in voisines
-                                      for i in self._voisines(j,
-                                                              portee - 1)]))
+        case = x * largeur + y
+        # On ne rajoute la parcelle que si l'on n'est pas au bord
+        cases = (plates[case + largeur] if x + 1 < longueur else None,
+                 plates[case - largeur] if x else None,
+                 plates[case + 1] if y + 1 < largeur else None,
+                 plates[case - 1] if y else None)
+        return tuple(voisine for voisine in cases if voisine is not None)
+
+    def _anneaux(self, parcelle, portee: int) -> list:
+        """Renvoie les anneaux de voisines de la parcelle jusqu'à portee.
+
+        L'anneau 0 ne contient que la parcelle, l'anneau k les parcelles à une
+        distance de Manhattan k. Les anneaux sont gardés dans _cache_anneaux :
+        une portée plus grande prolonge le parcours en largeur là où il
+        s'était arrêté au lieu de le reprendre depuis la parcelle.
+        """
+        anneaux = self._cache_anneaux.get(parcelle)
+        if anneaux is None:
+            largeur = len(self._parcelles[0])
+            anneaux = [[parcelle.pos_x * largeur + parcelle.pos_y]]
+            self._cache_anneaux[parcelle] = anneaux
+        if len(anneaux) > portee:
+            return anneaux[:portee + 1]
+        longueur = len(self._parcelles)
+        largeur = len(self._parcelles[0])
+        plates = self._parcelles_plates
+        # Les voisines de l'anneau k sont dans les anneaux k-1, k et k+1 :
+        # seuls les deux derniers anneaux sont marqués comme déjà vus
+        vues = bytearray(longueur * largeur)
+        for anneau in anneaux[-2:]:
+            for case in anneau:
+                vues[case] = 1
+        while len(anneaux) <= portee:
+            suivant = []
+            for case in anneaux[-1]:
+                x, y = divmod(case, largeur)
+                # On ne rajoute la parcelle que si l'on n'est pas au bord
+                for voisine in (case + largeur if x + 1 < longueur else -1,
+                                case - largeur if x else -1,
+                                case + 1 if y + 1 < largeur else -1,
+                                case - 1 if y else -1):
+                    if voisine >= 0 and not vues[voisine]:
+                        vues[voisine] = 1
+                        if plates[voisine] is not None:
+                            suivant.append(voisine)
+            anneaux.append(suivant)
+        return anneaux
 
     def voisinerandom(self, parcelle, portee: int = 1):
         """Renvoie une parcelle voisine aléatoire de la parcelle.
 
         Renvoie None si la parcelle n'a pas de parcelle voisine.
         """
-        voisines = self.voisines(parcelle, portee)
-        if voisines == [None] or not voisines:
+        voisines = self._voisines_cachees(parcelle, portee)
+        if not voisines:
             return None
         else:
             return choice(voisines)
@@ -472,6 +609,8 @@ class Parcelle():
         Liste des plantes présentes sur la parcelle.
     insectes : list[Insecte]
         Liste des insectes présents sur la parcelle.
+    n_insectes : int
+        Nombre d'insectes présents sur la parcelle.
     dispositif : Dispositif
         Dispositif de diffusion de la parcelle, si présent.
     engrais : int
@@ -485,6 +624,21 @@ class Parcelle():
     _arrose : bool
         True si la parcelle a été arrosée durant ce pas. Se reset à chaque
         fois que la parcelle met à jour son état.
+    _drageons : list[Drageon]
+        Drageons de la parcelle, dans le même ordre que dans plantes. Tenue
+        à jour par planter et retirer.
+    _surface_occupee : float
+        Surface totale occupée par les plantes de la parcelle, tenue à jour
+        par planter et retirer.
+    _partenaires : dict[(int, bool), list[Insecte]]
+        Insectes disponibles pour la reproduction, rangés par code d'espèce
+        et par sexe. Reconstruit à chaque pas avant la phase de reproduction.
+    _rangs_partenaires : dict[Insecte, int]
+        Rang de chaque insecte de _partenaires dans sa liste, pour le retirer
+        en temps constant.
+    _voisines_1 : tuple[Parcelle]|None
+        Parcelles voisines à une distance de 1, renseignées par le potager à
+        la première recherche. None tant qu'elles n'ont pas été cherchées.
 
     Methods
     -------
@@ -492,6 +646,14 @@ class Parcelle():
         Met à jour toutes les plantes de la parcelle.
     update_insectes(self) -> None:
         Met à jour tous les insectes de la parcelle.
+    indexer_partenaires(self) -> None:
+        Range les insectes disponibles par espèce et par sexe.
+    ajouter_partenaire(self, insecte: Insecte) -> None:
+        Ajoute un insecte disponible à l'index des partenaires.
+    retirer_partenaire(self, insecte: Insecte) -> None:
+        Retire un insecte de l'index des partenaires.
+    tirer_partenaire(self, code_espece: int, sexe: bool) -> Insecte|None:
+        Tire au hasard un insecte disponible de l'espèce et du sexe donnés.
     update_dispositif(self) -> None:
         Vérifie si le dispositif devrait être actif ce pas-ci et simule son
         activation si c'est le cas
@@ -502,6 +664,8 @@ class Parcelle():
         Renvoie l'humidité après arrosage.
     accueillir(self,list[Insecte]) -> None
         Déplace l'insecte de sa parcelle d'origine à celle-ci.
+    retirer(self, plante: Plante) -> None
+        Retire la plante de la parcelle et libère sa surface.
 
     mettre_engrais(self) -> None:
         Change la quantité d'engrais de la parcelle pour
@@ -512,6 +676,13 @@ class Parcelle():
         simuler la dispersion d'insecticide par un dispositif.
     """
 
+    # Les parcelles peuvent être des milliers : pas de __dict__, on ne peut
+    # donc pas leur ajouter d'attribut en dehors de ceux-ci.
+    __slots__ = ("_potager", "_pos_x", "_pos_y", "_plantes", "_drageons",
+                 "_surface_occupee", "_insectes", "_humidite", "_dispositif",
+                 "_engrais", "_insecticide", "_arrose", "_partenaires",
+                 "_rangs_partenaires", "_voisines_1", "_repr")
+
     def __init__(self,
                  potager: Potager,
                  pos_x: int,
@@ -560,11 +731,16 @@ class Parcelle():
                 self._pos_y = int(pos_y)
             except ValueError as exc:
                 raise TypeError("pos_x et pos_y ne sont pas valides.") from exc
+            # Les coordonnées ne changent plus : la représentation est
+            # formatée une fois pour toutes
+            self._repr = f"({self._pos_x}, {self._pos_y})"
         else:
             raise TypeError("potager doit être une instance de Potager.")
 
         # Définition des plantes
         self._plantes = []
+        self._drageons = []
+        self._surface_occupee = 0.0
         if isinstance(plantes, list):
             for entree in plantes:  # Pour chaque plante de la parcelle
                 self.planter(entree)
@@ -601,6 +777,11 @@ class Parcelle():
         self._engrais = 0
         self._insecticide = 0
         self._arrose = 0
+        # Index des insectes disponibles pour la reproduction
+        self._partenaires = {}
+        self._rangs_partenaires = {}
+        # Voisines directes, renseignées par le potager
+        self._voisines_1 = None
 
     @property
     def pos_x(self) -> int:
@@ -625,22 +806,22 @@ class Parcelle():
     @property
     def surface_totale(self) -> float:
         """Renvoie la surface totale occupée par les plantes de la parcelle."""
-        return sum([plante._surface_parcelle for plante in self.plantes])
+        return self._surface_occupee
 
     @property
     def insectes(self) -> list:
         """Attribute insectes getter."""
         return self._insectes
 
+    @property
+    def n_insectes(self) -> int:
+        """Renvoie le nombre total d'insectes sur la parcelle."""
+        return len(self._insectes)
+
     @property
     def nb_insectes(self) -> dict:
         """Obtenir le nombre d'insectes sur la parcelle de chaque espèce."""
-        l_insectes = dict()
-        for i in self.insectes:
-            if i.espece not in l_insectes.keys():
-                l_insectes[i.espece] = 0
-            l_insectes[i.espece] += 1
-        return l_insectes
+        return Counter(insecte.espece for insecte in self._insectes)
     @property
     def dispositif(self) -> (Dispositif, None):
         """Attribute dispositif getter."""
@@ -676,37 +857,103 @@ class Parcelle():
 
     def update_plantes(self) -> None:
         """Met à jour toutes les plantes de la parcelle."""
-        for plante in self._plantes:
-            plante.update_developpement()
-        for plante in self._plantes:
+        # L'état de la parcelle est relevé une fois pour toutes ses plantes
+        humidite = self._humidite
+        devs = developpements(self._engrais > 0, len(self._insectes) != 0)
+        # Développement et récolte en une seule passe. Une plante qui a donné
+        # toutes ses récoltes est retirée de la parcelle par update_fruits :
+        # on parcourt une copie de la liste
+        for plante in tuple(self._plantes):
+            plante.developper(humidite, devs)
             plante.update_fruits()
-        for plante in self._plantes:
-            if isinstance(plante, Drageon):
-                plante.coloniser()
+        # Les parcelles voisines sont relevées une fois pour tous les
+        # drageons de la parcelle
+        if self._drageons:
+            voisines = self._potager._voisines_cachees(self)
+            for drageon in self._drageons:
+                drageon.coloniser(voisines)
 
     def update_insectes(self) -> None:
         """Met à jour tous les insectes de la parcelle."""
+        # Une seule passe retire les insectes morts et nourrit les survivants
+        survivants = []
         for insecte in self._insectes:
-            insecte.survivre()
-        for insecte in self._insectes:
-            insecte.se_nourrir()
+            if not insecte.survivre():
+                insecte.se_nourrir()
+                insecte._rang = len(survivants)
+                survivants.append(insecte)
+        self._insectes = survivants
+        self.indexer_partenaires()
         for insecte in self._insectes:
             for i in insecte.reproduire():
                 self.accueillir(i)
-        for insecte in self._insectes:
+        # Les insectes qui partent sont retirés de self._insectes
+        for insecte in tuple(self._insectes):
             insecte.bouger()
 
+    def indexer_partenaires(self) -> None:
+        """Range les insectes disponibles par espèce et par sexe.
+
+        L'index est maintenu pendant la phase de reproduction par
+        ajouter_partenaire et retirer_partenaire, ce qui évite de parcourir
+        toute la parcelle à chaque recherche de partenaire.
+        """
+        self._partenaires = {}
+        self._rangs_partenaires = {}
+        for insecte in self._insectes:
+            if insecte.disponible:
+                self.ajouter_partenaire(insecte)
+
+    def ajouter_partenaire(self, insecte) -> None:
+        """Ajoute un insecte disponible à l'index des partenaires.
+
+        Ne fait rien si l'insecte est déjà indexé.
+        """
+        if insecte in self._rangs_partenaires:
+            return
+        candidats = self._partenaires.setdefault(
+            (insecte._code_espece, insecte._sexe), [])
+        self._rangs_partenaires[insecte] = len(candidats)
+        candidats.append(insecte)
+
+    def retirer_partenaire(self, insecte) -> None:
+        """Retire un insecte de l'index des partenaires en temps constant.
+
+        Le dernier insecte de sa liste prend sa place. Ne fait rien si
+        l'insecte n'est pas indexé.
+        """
+        rang = self._rangs_partenaires.pop(insecte, None)
+        if rang is None:
+            return
+        candidats = self._partenaires[(insecte._code_espece, insecte._sexe)]
+        dernier = candidats.pop()
+        if dernier is not insecte:
+            candidats[rang] = dernier
+            self._rangs_partenaires[dernier] = rang
+
+    def tirer_partenaire(self, code_espece: int, sexe: bool):
+        """Tire au hasard un insecte disponible de l'espèce et du sexe donnés.
+
+        L'insecte tiré est retiré de l'index des partenaires, puisqu'il ne
+        sera plus disponible après l'accouplement.
+        Renvoie None si aucun insecte ne correspond.
+        """
+        candidats = self._partenaires.get((code_espece, sexe))
+        if not candidats:
+            return None
+        partenaire = candidats[randrange(len(candidats))]
+        self.retirer_partenaire(partenaire)
+        return partenaire
+
     def update_dispositif(self) -> None:
         """Vérifie si l'activation du dispositif et simule son activation."""
         if self._dispositif is None:
             return  # Pas de dispositif sur la parcelle
         produits = self._dispositif.actif
-        eau = "eau" in produits
-        engrais = "engrais" in produits
-        insecticide = "insecticide" in produits
+        if not produits:
+            return  # Aucun programme actif ce pas-ci
         try:
-            self._potager.affecter(self._dispositif.portee, self,
-                                   eau, engrais, insecticide)
+            self._potager.affecter(self._dispositif._portee, self, produits)
         except AttributeError as exc:
             raise UnboundLocalError("Le potager doit être définie pour"
                                     + " la parcelle.") from exc
@@ -726,8 +973,11 @@ class Parcelle():
             if self._humidite < 0:
                 self._humidite = 0  # L'humidité ne peut pas être négative
 
-        self._insecticide = max(self._insecticide - 1, 0)
-        self._engrais = max(self._engrais - 1, 0)
+        # Les intrants valent au moins 0 : on ne décompte que s'il en reste
+        if self._insecticide:
+            self._insecticide -= 1
+        if self._engrais:
+            self._engrais -= 1
         for plante in self._plantes:
             plante.pas()
         for insecte in self._insectes:
@@ -765,51 +1015,85 @@ class Parcelle():
 
         Renvoie None si la parcelle n'a pas de parcelle voisine.
         """
-        return self.potager.voisinerandom(self)
+        voisines = self._voisines_1
+        if voisines is None:
+            voisines = self._potager._voisines_cachees(self)
+        if not voisines:
+            return None
+        return voisines[randrange(len(voisines))]
 
     def voisines(self, portee: int = 1) -> list:
         """Renvoie la liste des parcelles voisine de la parcelle.
 
         Renvoie [] si la parcelle n'a pas de voisines.
         """
-        return self.potager.voisines(self, portee)
+        if portee == 1 and self._voisines_1 is not None:
+            return list(self._voisines_1)
+        return self._potager.voisines(self, portee)
 
     def accueillir(self, insecte) -> None:
         """Déplace l'insecte de sa parcelle d'origine à celle-ci."""
         if isinstance(insecte, Insecte):
             if insecte.parcelle is not None:
-                insecte.parcelle._insectes.remove(insecte)
+                insecte.parcelle._retirer_insecte(insecte)
             # On définit sa parcelle
             insecte.parcelle = self
+            insecte._rang = len(self._insectes)
             self._insectes.append(insecte)
-            log.info(f"{insecte.espece} accueilli sur la parcelle {self}")
+            log.info("%s accueilli sur la parcelle %s", insecte._espece, self)
         else:
             raise TypeError(
                 "Chaque élément doit être "
                 + "instance de Insecte ou hérité.")
 
+    def _retirer_insecte(self, insecte) -> None:
+        """Retire l'insecte de la parcelle en temps constant.
+
+        Le dernier insecte de la liste prend la place de l'insecte retiré.
+        """
+        dernier = self._insectes.pop()
+        if dernier is not insecte:
+            self._insectes[insecte._rang] = dernier
+            dernier._rang = insecte._rang
+
     def planter(self, plante) -> None:
         """Ajoute la plante aux plantes de la parcelle."""
         if isinstance(plante, Plante):
             # On définit sa parcelle
             plante.parcelle = self
             self._plantes.append(plante)
-            log.info(f"{plante.espece} plantée sur la parcelle {self}")
+            if isinstance(plante, Drageon):
+                self._drageons.append(plante)
+            self._surface_occupee += plante._surface_parcelle
+            log.info("%s plantée sur la parcelle %s", plante._espece, self)
         else:
             raise TypeError(
                 "Chaque élément doit être "
                 + "instance de Plante ou hérité.")
 
+    def retirer(self, plante) -> None:
+        """Retire la plante de la parcelle et libère sa surface."""
+        self._plantes.remove(plante)
+        if isinstance(plante, Drageon):
+            self._drageons.remove(plante)
+        # Le total est recalculé depuis les plantes restantes : les retraits
+        # successifs accumuleraient des erreurs d'arrondi
+        self._surface_occupee = sum(p._surface_parcelle for p in self._plantes)
+        plante.parcelle = None
+        log.info("%s retirée de la parcelle %s", plante._espece, self)
+
     def __repr__(self):
         """__repr__ of Parcelle class."""
-        return str((self.pos_x, self.pos_y))
+        return self._repr
 
 
 if __name__ == "__main__":
 
+    import unittest
     from tests import tests_potager, tests_parcelle
 
+    # Les tests passent par une suite, qui prépare leur classe (setUpClass)
     print("""=== Test de la classe Potager ===""")
-    tests_potager("test").run()
+    unittest.TestSuite([tests_potager("test")]).run(unittest.TestResult())
     print("""=== Test de la classe Parcelle ===""")
-    tests_parcelle("test").run()
+    unittest.TestSuite([tests_parcelle("test")]).run(unittest.TestResult())